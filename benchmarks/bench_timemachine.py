@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+
+"""Microbenchmarks for timemachine and the statistics write path
+
+Synthetic HistoricalState series are generated with configurable jitter, gaps
+and duplicates. Each case is measured for time (best of --repeat runs) and
+peak memory (tracemalloc, in a separate run). The recorder is stubbed out.
+
+Usage:
+    python benchmarks/bench_timemachine.py --sizes 1k,100k --save baseline.json
+    python benchmarks/bench_timemachine.py --compare baseline.json --threshold 0.2
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant_historical_sensor import sensor as sensor_mod  # noqa: E402
+from homeassistant_historical_sensor import timemachine as tm  # noqa: E402
+from homeassistant_historical_sensor.calculators import (  # noqa: E402
+    CumulativeSumCalculator,
+)
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(value[-1], 1)
+    return int(float(value.rstrip("km")) * mult)
+
+
+def generate_series(
+    n: int,
+    *,
+    step: int = 15 * 60,
+    jitter: float = 0.0,
+    gaps: float = 0.0,
+    duplicates: float = 0.0,
+    seed: int = 0,
+) -> list[tm.HistoricalState]:
+    """n states every `step` seconds
+
+    - jitter: max random offset, as a fraction of step
+    - gaps: probability of skipping a step
+    - duplicates: probability of repeating the previous timestamp
+    """
+
+    rng = random.Random(seed)
+    ts = 1_600_000_000
+    ret = []
+    while len(ret) < n:
+        if ret and rng.random() < duplicates:
+            prev = ret[-1].timestamp
+        else:
+            ts += step
+            while rng.random() < gaps:
+                ts += step
+            prev = ts + rng.uniform(-jitter, jitter) * step
+
+        ret.append(tm.HistoricalState(state=rng.uniform(0, 2), timestamp=prev))
+
+    return ret
+
+
+class _FakeWatermarkStore:
+    def get(self, statistic_id):
+        return None
+
+    def async_set(self, statistic_id, watermark):
+        pass
+
+
+class _BenchHass:
+    """Just enough of HomeAssistant for the executor calculation path"""
+
+    def __init__(self):
+        self.data = {}
+
+    @property
+    def loop(self):
+        return asyncio.get_running_loop()
+
+    def async_add_executor_job(self, target, *args):
+        return self.loop.run_in_executor(None, target, *args)
+
+
+class _BenchSensor(sensor_mod.HistoricalSensor):
+    STATISTIC_CALCULATOR = CumulativeSumCalculator()
+    # Always on the event loop, there is no hass to run executor jobs
+    CALCULATION_EXECUTOR_THRESHOLD = None
+    entity_id = "sensor.bench"
+
+    @property
+    def name(self):
+        return "bench"
+
+    @property
+    def unit_of_measurement(self):
+        return "kWh"
+
+    async def async_update_historical(self):
+        pass
+
+
+class _BenchExecutorSensor(_BenchSensor):
+    CALCULATION_EXECUTOR_THRESHOLD = 0
+    CALCULATION_EXECUTOR = "thread"
+
+
+def _write_statistics(states, *, executor: bool = False) -> Any:
+    async def _fake_store(hass):
+        return _FakeWatermarkStore()
+
+    async def _fake_last_statistic(hass, metadata, **kwargs):
+        return None
+
+    async def _fake_import(hass, metadata, rows, **kwargs):
+        return []
+
+    if executor:
+        sensor = _BenchExecutorSensor()
+        sensor.hass = _BenchHass()
+    else:
+        sensor = _BenchSensor()
+        sensor.hass = None
+
+    with (
+        mock.patch.object(sensor_mod, "async_get_watermark_store", _fake_store),
+        mock.patch.object(tm, "hass_get_last_statistic", _fake_last_statistic),
+        mock.patch.object(sensor_mod, "async_import_statistics_chunked", _fake_import),
+    ):
+        return asyncio.run(sensor._async_write_statistics(states))
+
+
+def _water_usage_calculate(states) -> Any:
+    from custom_components.home_water_usage.sensor.sensor import WaterUsageSensor
+
+    sensor = WaterUsageSensor.__new__(WaterUsageSensor)
+    return asyncio.run(sensor.async_calculate_statistic_data(states))
+
+
+CASES: dict[str, Callable[[list[tm.HistoricalState]], Callable[[], Any]]] = {
+    "blockize": lambda states: lambda: [tm.blockize(x) for x in states],
+    "block_keys": lambda states: lambda: tm.block_keys([x.timestamp for x in states]),
+    "group_by_interval[list]": lambda states: lambda: [
+        list(g) for _, g in tm.group_by_interval(states)
+    ],
+    "group_by_interval[array]": lambda states: (
+        lambda arr: lambda: list(tm.group_by_interval(arr))
+    )(tm.HistoricalStateArray.from_states(states)),
+    "write_statistics[list]": lambda states: lambda: _write_statistics(states),
+    "write_statistics[array]": lambda states: (
+        lambda arr: lambda: _write_statistics(arr)
+    )(tm.HistoricalStateArray.from_states(states)),
+    "write_statistics[executor]": lambda states: (
+        lambda arr: lambda: _write_statistics(arr, executor=True)
+    )(tm.HistoricalStateArray.from_states(states)),
+    "water_usage_calculate": lambda states: lambda: _water_usage_calculate(states),
+}
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": min(times), "peak_bytes": peak}
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    results: dict[str, Any] = {}
+    cases = [x for x in CASES if not args.cases or x in args.cases]
+
+    for size in [parse_size(x) for x in args.sizes.split(",")]:
+        states = generate_series(
+            size, jitter=args.jitter, gaps=args.gaps, duplicates=args.duplicates
+        )
+        for case in cases:
+            key = f"{case}/{size}"
+            results[key] = measure(CASES[case](states), args.repeat)
+            print(
+                f"{key:40} {results[key]['seconds'] * 1000:10.2f} ms "
+                + f"{results[key]['peak_bytes'] / 2**20:10.2f} MiB"
+            )
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": tm.get_numpy() is not None,
+            "sizes": args.sizes,
+            "jitter": args.jitter,
+            "gaps": args.gaps,
+            "duplicates": args.duplicates,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for key, value in current["results"].items():
+        if (base := baseline["results"].get(key)) is None:
+            continue
+
+        for metric in ("seconds", "peak_bytes"):
+            if base[metric] and value[metric] > base[metric] * (1 + threshold):
+                ratio = value[metric] / base[metric]
+                regressions.append(f"{key} {metric}: x{ratio:.2f}")
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1k,10k,100k")
+    parser.add_argument("--cases", nargs="*", choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--gaps", type=float, default=0.0)
+    parser.add_argument("--duplicates", type=float, default=0.0)
+    parser.add_argument("--save", type=Path, help="save results as JSON baseline")
+    parser.add_argument("--compare", type=Path, help="compare with JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    current = run(args)
+
+    if args.save:
+        args.save.write_text(json.dumps(current, indent=2))
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if regressions := compare(current, baseline, args.threshold):
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+
+        print("No regressions")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""Check import time of homeassistant_historical_sensor against a budget
+
+Measures the sensor module of the library and the sensor platform of the
+home_water_usage integration, what HomeAssistant actually loads. Modules that
+are already loaded by then (core, config_entries, the sensor component, ...)
+are imported first so only the cost added by this package is measured, using
+`python -X importtime`.
+
+Usage: python benchmarks/importtime.py [--budget-ms MS] [--module NAME ...]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+PRELOAD = [
+    "homeassistant.const",
+    "homeassistant.core",
+    "homeassistant.util.dt",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.entity_platform",
+    "homeassistant.components.sensor",
+    "homeassistant.components.websocket_api",
+]
+
+BUDGETS_MS = {
+    "homeassistant_historical_sensor.sensor": 30,
+    "custom_components.home_water_usage.sensor": 60,
+}
+
+
+def measure(module: str) -> tuple[float, list[tuple[float, str]]]:
+    code = "; ".join(f"import {x}" for x in [*PRELOAD, module])
+
+    # HomeAssistant runs from cached bytecode, write it first so compiling
+    # isn't measured
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, check=True
+    )
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=env,
+    )
+
+    # Lines look like: "import time:  self [us] | cumulative | imported package"
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        entries.append((int(cumulative) / 1000, name[1:].rstrip()))
+
+    # Output is in post-order, everything after the last preloaded module
+    # belongs to the measured one
+    start = max(idx for idx, (_, name) in enumerate(entries) if name in PRELOAD)
+    entries = entries[start + 1 :]
+
+    total = next(ms for ms, name in entries if name.strip() == module)
+    slowest = sorted(entries, reverse=True)[:10]
+    return total, slowest
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float)
+    parser.add_argument("--module", nargs="*", default=list(BUDGETS_MS))
+    args = parser.parse_args()
+
+    ret = 0
+    for module in args.module:
+        budget = args.budget_ms or BUDGETS_MS.get(module, 50)
+        total, slowest = measure(module)
+
+        print(f"{module}: {total:.1f} ms (budget {budget:.1f} ms)")
+        for ms, name in slowest:
+            print(f"  {ms:8.1f} ms {name}")
+
+        if total > budget:
+            ret = 1
+
+    return ret
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+"""Offline scale harness: N historical sensors against a real recorder
+
+Starts a minimal HomeAssistant instance with the recorder on a local SQLite
+file, adds N simulated PollUpdateMixin sensors with fake providers and drives
+them through --ticks update intervals on a simulated clock (no waiting for real
+time). The event loop clock is moved forward, so updates run from the sensors'
+own poll schedule (jitter, backoff, catch up). Reports import throughput, event
+loop lag, recorder queue depth and database size.
+
+Usage: python benchmarks/scale_harness.py --sensors 300 --ticks 24
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from homeassistant import config_entries, loader  # noqa: E402
+from homeassistant.components import recorder  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import area_registry as ar  # noqa: E402
+from homeassistant.helpers import category_registry as cr  # noqa: E402
+from homeassistant.helpers import device_registry as dr  # noqa: E402
+from homeassistant.helpers import entity  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from homeassistant.helpers import floor_registry as fr  # noqa: E402
+from homeassistant.helpers import issue_registry as ir  # noqa: E402
+from homeassistant.helpers import label_registry as lr  # noqa: E402
+from homeassistant.helpers import recorder as recorder_helper  # noqa: E402
+from homeassistant.helpers.entity_component import EntityComponent  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+from homeassistant.util import dt as dtutil  # noqa: E402
+
+from homeassistant_historical_sensor import (  # noqa: E402
+    CumulativeSumCalculator,
+    HistoricalSensor,
+    HistoricalState,
+    PollUpdateMixin,
+)
+
+LOGGER = logging.getLogger("scale_harness")
+
+
+class SimulatedClockLoop(asyncio.SelectorEventLoop):
+    """Event loop with a clock that can be moved forward
+
+    Timers (async_call_later, async_track_time_interval...) are scheduled on the
+    loop clock, moving it forward fires them as if that time had passed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.offset = 0.0
+
+    def time(self) -> float:
+        return super().time() + self.offset
+
+
+class SimulatedClock:
+    """Provider clock, follows the event loop clock from `start`"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, start: float):
+        self._loop = loop
+        self._loop_t0 = loop.time()
+        self._start = start
+
+    @property
+    def now(self) -> float:
+        return self._start + self._loop.time() - self._loop_t0
+
+
+class FakeProviderSensor(PollUpdateMixin, HistoricalSensor):
+    """Provider returning one reading each `step` seconds up to clock.now"""
+
+    STATISTIC_CALCULATOR = CumulativeSumCalculator()
+
+    def __init__(self, idx: int, clock: SimulatedClock, step: int):
+        super().__init__()
+        self.entity_id = f"sensor.scale_harness_{idx}"
+        self._attr_name = f"Scale harness {idx}"
+        self._attr_native_unit_of_measurement = "kWh"
+        self._clock = clock
+        self._step = step
+        self._next_ts = clock.now
+
+    async def async_update_historical(self) -> None:
+        states = []
+        while self._next_ts <= self._clock.now:
+            states.append(HistoricalState(state=0.25, timestamp=self._next_ts))
+            self._next_ts += self._step
+
+        self._attr_historical_states = states
+
+
+class Monitor:
+    """Samples event loop lag and recorder backlog in background"""
+
+    def __init__(self, hass: HomeAssistant, period: float = 0.05):
+        self._hass = hass
+        self._period = period
+        self.lags: list[float] = []
+        self.backlogs: list[int] = []
+
+    async def run(self) -> None:
+        instance = recorder.get_instance(self._hass)
+        while True:
+            t0 = time.monotonic()
+            await asyncio.sleep(self._period)
+            # Sleeps end early when the simulated clock jumps
+            self.lags.append(max(0.0, time.monotonic() - t0 - self._period))
+            self.backlogs.append(instance.backlog)
+
+
+async def async_setup_hass(config_dir: str) -> HomeAssistant:
+    """Bare HomeAssistant with what bootstrap loads before any integration
+
+    Mirrors async_test_home_assistant from HA's test suite: config entries,
+    entity helpers and the registries entity platforms rely on.
+    """
+
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    await hass.config.async_set_time_zone("UTC")
+
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+
+    entity.async_setup(hass)
+    loader.async_setup(hass)
+
+    await ar.async_load(hass)
+    await cr.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    await fr.async_load(hass)
+    await ir.async_load(hass)
+    await lr.async_load(hass)
+
+    return hass
+
+
+async def async_fire_time_changed(hass: HomeAssistant, seconds: float) -> None:
+    """Move the loop clock forward and wait for the jobs of fired timers"""
+    hass.loop.offset += seconds
+    await hass.async_block_till_done()
+
+
+async def async_run(args: argparse.Namespace) -> dict:
+    config_dir = args.config_dir or tempfile.mkdtemp(prefix="scale_harness_")
+    db_path = os.path.join(config_dir, "home-assistant_v2.db")
+
+    hass = await async_setup_hass(config_dir)
+
+    # The recorder helper must be initialized before the recorder is set up
+    recorder_helper.async_initialize_recorder(hass)
+    assert await async_setup_component(
+        hass,
+        recorder.DOMAIN,
+        {recorder.DOMAIN: {"db_url": f"sqlite:///{db_path}", "commit_interval": 1}},
+    )
+    await hass.async_start()
+    await recorder.get_instance(hass).async_db_ready
+
+    interval = PollUpdateMixin.UPDATE_INTERVAL
+    hour = 60 * 60
+    start = (int(dtutil.utcnow().timestamp()) // hour) * hour
+    clock = SimulatedClock(hass.loop, start - args.ticks * interval.total_seconds())
+    sensors = [FakeProviderSensor(idx, clock, args.step) for idx in range(args.sensors)]
+
+    monitor = Monitor(hass)
+    monitor_task = hass.async_create_background_task(monitor.run(), "monitor")
+
+    t0 = time.monotonic()
+
+    # Adding entities starts their background startup (initial update)
+    component = EntityComponent(LOGGER, "sensor", hass)
+    await component.async_add_entities(sensors)
+    await asyncio.gather(*(s._startup_task for s in sensors if s._startup_task))
+
+    # Small steps, polls scheduled in between (ex. catch up) must fire too
+    steps = max(1, round(interval.total_seconds() / args.resolution))
+    for tick in range(args.ticks):
+        for _ in range(steps):
+            await async_fire_time_changed(hass, interval.total_seconds() / steps)
+        LOGGER.info(f"tick {tick + 1}/{args.ticks} done")
+
+    await recorder.get_instance(hass).async_block_till_done()
+    elapsed = time.monotonic() - t0
+
+    monitor_task.cancel()
+    rows = sum(s.historical_metrics.counters.get("rows_out", 0) for s in sensors)
+    updates = sum(s._update_runs for s in sensors)
+    await hass.async_stop()
+
+    db_size = sum(
+        os.path.getsize(p) for p in (db_path, f"{db_path}-wal") if os.path.exists(p)
+    )
+    lags = sorted(monitor.lags) or [0.0]
+
+    return {
+        "sensors": args.sensors,
+        "ticks": args.ticks,
+        "simulated": str(timedelta(seconds=args.ticks * interval.total_seconds())),
+        "elapsed_s": round(elapsed, 2),
+        "updates": updates,
+        "rows": rows,
+        "rows_per_s": round(rows / elapsed, 1) if elapsed else None,
+        "loop_lag_p50_ms": round(statistics.median(lags) * 1000, 1),
+        "loop_lag_p95_ms": round(lags[int(0.95 * (len(lags) - 1))] * 1000, 1),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 1),
+        "recorder_backlog_max": max(monitor.backlogs, default=0),
+        "db_size_mib": round(db_size / 2**20, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sensors", type=int, default=100)
+    parser.add_argument("--ticks", type=int, default=24)
+    parser.add_argument("--step", type=int, default=15 * 60, help="seconds")
+    parser.add_argument(
+        "--resolution", type=int, default=60, help="simulated clock step, seconds"
+    )
+    parser.add_argument("--config-dir", help="defaults to a temporary directory")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    result = asyncio.run(async_run(args), loop_factory=SimulatedClockLoop)
+    for key, value in result.items():
+        print(f"{key:24} {value}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
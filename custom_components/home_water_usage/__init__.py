@@ -1,26 +1,75 @@
+import asyncio
+import csv
 import logging
+from collections import defaultdict
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.util import slugify
 
-from .const import DOMAIN
+from .const import ATTR_METER_ID, DATA_METERS, DEFAULT_METER_ID, DOMAIN
+from .homeassistant_historical_sensor import hass_check_version
+from .importer import parse_usage_file
 
 LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Home Water Usage from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {}
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up Home Water Usage, services are shared by all entries."""
+    # meter_id -> WaterUsageSensor, filled by the sensor platform
+    hass.data.setdefault(DOMAIN, {DATA_METERS: {}})
 
     # Register services
     await _register_services(hass)
 
+    return True
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up Home Water Usage from a config entry."""
+    try:
+        hass_check_version()
+    except SystemError as e:
+        LOGGER.error(e)
+        return False
+
     await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload entry when options (ex. update interval) change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+def _normalize_meter_id(meter_id) -> str:
+    """Meter id as stored by the config flow (ex. "Main Meter" -> main_meter)."""
+    return slugify(str(meter_id)) if meter_id else DEFAULT_METER_ID
+
+
+def _get_meter(hass: HomeAssistant, meter_id: str | None):
+    """Find the sensor of a meter, the default one if meter_id is not set."""
+    meter_id = _normalize_meter_id(meter_id)
+    sensor = hass.data[DOMAIN][DATA_METERS].get(meter_id)
+    if sensor is None:
+        LOGGER.error(f"Unknown meter: {meter_id}")
+
+    return sensor
+
+
+async def _async_write_meter(sensor) -> None:
+    """Save a meter's data and write its statistics."""
+    await sensor._save_data()
+    await sensor.async_request_historical_update()
+
+
 async def _register_services(hass: HomeAssistant):
     """Register integration services."""
     async def add_water_usage_service(call):
@@ -32,50 +81,112 @@ async def _register_services(hass: HomeAssistant):
             LOGGER.error("Missing year_month or usage parameter")
             return
 
-        # Find sensor instance
-        for entry_id, entry_data in hass.data[DOMAIN].items():
-            sensor = entry_data.get("sensor")
-            if sensor:
-                sensor.add_water_usage(str(year_month), float(usage))
-                await sensor.async_update_historical()
-                await sensor.async_write_historical()
-                break
+        sensor = _get_meter(hass, call.data.get(ATTR_METER_ID))
+        if sensor:
+            sensor.add_water_usage(str(year_month), float(usage))
+            await sensor.async_request_historical_update()
 
     async def set_historical_data_service(call):
-        """Service to set historical data directly (for Node-RED integration)."""
+        """Service to set historical data directly (for Node-RED integration).
+
+        Each point can set its own meter_id, defaults to the call's one.
+        """
         data_points = call.data.get("data_points", [])
 
         if not data_points:
             LOGGER.error("No data_points provided")
             return
 
-        # Find sensor instance
-        for entry_id, entry_data in hass.data[DOMAIN].items():
-            sensor = entry_data.get("sensor")
-            if sensor:
-                # Clear existing data and set new historical data
-                sensor._data.clear()
-
-                for point in data_points:
-                    year_month = point.get("year_month")
-                    usage = point.get("usage")
-                    if year_month and usage is not None:
-                        sensor._data[str(year_month)] = float(usage)
-
-                await sensor._save_data()
-                await sensor.async_update_historical()
-                await sensor.async_write_historical()
-                LOGGER.info(f"Set {len(data_points)} historical data points")
-                break
+        data_by_meter = defaultdict(dict)
+        for point in data_points:
+            meter_id = _normalize_meter_id(
+                point.get(ATTR_METER_ID) or call.data.get(ATTR_METER_ID)
+            )
+            year_month = point.get("year_month")
+            usage = point.get("usage")
+            if year_month and usage is not None:
+                data_by_meter[meter_id][str(year_month)] = float(usage)
+
+        # Clear existing data and set new historical data
+        sensors = []
+        for meter_id, data in data_by_meter.items():
+            if sensor := _get_meter(hass, meter_id):
+                sensor.set_water_usage(data)
+                sensors.append(sensor)
+
+        await asyncio.gather(*(_async_write_meter(sensor) for sensor in sensors))
+        LOGGER.info(
+            f"Set {len(data_points)} historical data points "
+            + f"for {len(sensors)} meters"
+        )
+
+    async def import_file_service(call: ServiceCall) -> dict:
+        """Service to import water usage data from a CSV or JSONL file.
+
+        Rows can have a meter_id column, defaults to the call's meter_id.
+        """
+        path = call.data.get("path")
+
+        if not path:
+            raise ServiceValidationError("Missing path")
+
+        # Does blocking I/O (resolves the path)
+        if not await hass.async_add_executor_job(
+            hass.config.is_allowed_path, str(path)
+        ):
+            raise ServiceValidationError(
+                f"Path {path} is not allowed, add its directory to "
+                + "allowlist_external_dirs"
+            )
+
+        default_meter_id = call.data.get(ATTR_METER_ID) or DEFAULT_METER_ID
+        try:
+            result = await hass.async_add_executor_job(
+                parse_usage_file, str(path), default_meter_id
+            )
+        except (OSError, UnicodeDecodeError, csv.Error, ValueError) as e:
+            raise HomeAssistantError(f"Unable to import {path}: {e}") from e
+
+        # Files can spell the same meter differently (ex. "Main Meter")
+        data_by_meter = defaultdict(dict)
+        for meter_id, data in result.data.items():
+            data_by_meter[_normalize_meter_id(meter_id)].update(data)
+
+        sensors = []
+        unknown_meters = []
+        for meter_id, data in data_by_meter.items():
+            if sensor := _get_meter(hass, meter_id):
+                sensor.merge_water_usage(data)
+                sensors.append(sensor)
+            else:
+                unknown_meters.append(meter_id)
+
+        await asyncio.gather(*(_async_write_meter(sensor) for sensor in sensors))
+
+        LOGGER.info(
+            f"Imported {len(sensors)} meters from {path}: "
+            + f"{result.rows} rows ({result.rows_per_second:.0f} rows/s), "
+            + f"{result.rejected} rejected"
+        )
+        return {
+            "rows": result.rows,
+            "rejected": result.rejected,
+            "meters": len(sensors),
+            "unknown_meters": unknown_meters,
+            "rows_per_second": round(result.rows_per_second, 1),
+        }
 
     hass.services.async_register(DOMAIN, "add_water_usage", add_water_usage_service)
     hass.services.async_register(DOMAIN, "set_historical_data", set_historical_data_service)
+    hass.services.async_register(
+        DOMAIN,
+        "import_file",
+        import_file_service,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, ["sensor"])
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
-
-    return unload_ok
+    # Sensors remove themselves from the meter registry
+    return await hass.config_entries.async_unload_platforms(entry, ["sensor"])
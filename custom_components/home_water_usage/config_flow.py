@@ -1,9 +1,19 @@
 from typing import Any
 
+import voluptuous as vol
 from homeassistant import config_entries
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.util import slugify
 
-from .const import DOMAIN, NAME
+from .const import (
+    CONF_METERS,
+    CONF_UPDATE_INTERVAL,
+    DEFAULT_METER_ID,
+    DEFAULT_UPDATE_INTERVAL,
+    DOMAIN,
+    NAME,
+)
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call-arg]
@@ -14,3 +24,36 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):  # type: ignore[call
     ) -> FlowResult:
         """Handle a flow initialized by the user."""
         return self.async_create_entry(title=NAME, data={})
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        return OptionsFlowHandler()
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage update interval (in minutes) and meters (comma separated)."""
+        if user_input is not None:
+            meters = [slugify(x) for x in user_input[CONF_METERS].split(",")]
+            user_input[CONF_METERS] = list(dict.fromkeys(x for x in meters if x))
+            user_input[CONF_METERS] = user_input[CONF_METERS] or [DEFAULT_METER_ID]
+            return self.async_create_entry(title="", data=user_input)
+
+        current = self.config_entry.options.get(
+            CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
+        )
+        meters = self.config_entry.options.get(CONF_METERS, [DEFAULT_METER_ID])
+        schema = vol.Schema(
+            {
+                vol.Required(CONF_UPDATE_INTERVAL, default=current): vol.All(
+                    vol.Coerce(int), vol.Range(min=5)
+                ),
+                vol.Required(CONF_METERS, default=", ".join(meters)): str,
+            }
+        )
+        return self.async_show_form(step_id="init", data_schema=schema)
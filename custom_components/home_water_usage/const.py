@@ -1,3 +1,14 @@
 DOMAIN = "home_water_usage"
 NAME = "Home Water Usage"
 PLATFORM = "sensor"
+
+CONF_UPDATE_INTERVAL = "update_interval"
+DEFAULT_UPDATE_INTERVAL = 60  # minutes
+
+CONF_METERS = "meters"
+# The default meter keeps the single meter unique_id, entity_id and store
+DEFAULT_METER_ID = "default"
+
+ATTR_METER_ID = "meter_id"
+
+DATA_METERS = "meters"
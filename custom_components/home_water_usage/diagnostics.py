@@ -0,0 +1,24 @@
+"""Diagnostics support for Home Water Usage."""
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_METERS, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    meters = hass.data[DOMAIN][DATA_METERS]
+
+    return {
+        "options": dict(entry.options),
+        "meters": {
+            meter_id: sensor.get_historical_diagnostics()
+            for meter_id, sensor in meters.items()
+            if sensor.config_entry.entry_id == entry.entry_id
+        },
+    }
@@ -16,20 +16,84 @@
 # USA.
 
 
-from .sensor import HistoricalSensor, PollUpdateMixin
-from .timemachine import (
-    HistoricalState,
-    group_by_interval,
-    hass_check_version,
-    hass_get_last_statistic,
-)
+# Submodules are imported on first attribute access, so importing this package
+# doesn't pull sensor or recorder modules until they are actually needed.
+# Integrations should call hass_check_version() from their setup.
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .calculators import (
+        CumulativeSumCalculator,
+        MeanMinMaxCalculator,
+        StatisticCalculator,
+    )
+    from .journal import HistoricalJournal
+    from .scheduler import PollPolicy
+    from .sensor import HistoricalMetricsSensor, HistoricalSensor, PollUpdateMixin
+    from .timemachine import (
+        HistoricalState,
+        HistoricalStateArray,
+        HistoricalTimeline,
+        OutOfOrderStateError,
+        async_group_by_interval_streaming,
+        group_by_interval,
+        group_by_interval_streaming,
+        hass_check_version,
+        hass_get_last_statistic,
+    )
+
+_LAZY_ATTRIBUTES = {
+    "CumulativeSumCalculator": ".calculators",
+    "HistoricalJournal": ".journal",
+    "HistoricalMetricsSensor": ".sensor",
+    "HistoricalSensor": ".sensor",
+    "HistoricalState": ".timemachine",
+    "HistoricalStateArray": ".timemachine",
+    "HistoricalTimeline": ".timemachine",
+    "MeanMinMaxCalculator": ".calculators",
+    "OutOfOrderStateError": ".timemachine",
+    "PollPolicy": ".scheduler",
+    "PollUpdateMixin": ".sensor",
+    "StatisticCalculator": ".calculators",
+    "async_group_by_interval_streaming": ".timemachine",
+    "group_by_interval": ".timemachine",
+    "group_by_interval_streaming": ".timemachine",
+    "hass_check_version": ".timemachine",
+    "hass_get_last_statistic": ".timemachine",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if (module_name := _LAZY_ATTRIBUTES.get(name)) is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *_LAZY_ATTRIBUTES])
 
-hass_check_version()
 
 __all__ = [
+    "CumulativeSumCalculator",
+    "HistoricalJournal",
+    "HistoricalMetricsSensor",
     "HistoricalSensor",
     "HistoricalState",
+    "HistoricalStateArray",
+    "HistoricalTimeline",
+    "MeanMinMaxCalculator",
+    "OutOfOrderStateError",
+    "PollPolicy",
     "PollUpdateMixin",
+    "StatisticCalculator",
+    "async_group_by_interval_streaming",
     "group_by_interval",
+    "group_by_interval_streaming",
+    "hass_check_version",
     "hass_get_last_statistic",
 ]
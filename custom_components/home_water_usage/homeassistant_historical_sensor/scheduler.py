@@ -0,0 +1,104 @@
+# Copyright (C) 2021-2023 Luis López <luis@cuarentaydos.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
+# USA.
+
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant
+
+from .consts import (
+    DATA_PROCESS_POOL,
+    DATA_UPDATE_SEMAPHORE,
+    MAX_CONCURRENT_UPDATES,
+    PROCESS_POOL_WORKERS,
+)
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+@dataclass(frozen=True)
+class PollPolicy:
+    """Scheduling policy for PollUpdateMixin
+
+    - interval: normal delay between updates
+    - jitter: fraction of interval used to spread the first update of each sensor
+    - backoff_factor, max_interval: delay grows by backoff_factor after each
+      update without new data, up to max_interval
+    - catchup_interval, catchup_lag: while the newest written statistic is older
+      than catchup_lag the provider is assumed to be filling a gap and
+      catchup_interval is used. catchup_lag=None disables this.
+    """
+
+    interval: timedelta = timedelta(hours=1)
+    jitter: float = 1.0
+    backoff_factor: float = 2.0
+    max_interval: timedelta = timedelta(hours=6)
+    catchup_interval: timedelta = timedelta(minutes=5)
+    catchup_lag: timedelta | None = timedelta(hours=3)
+
+    def initial_delay(self, seed: str) -> float:
+        # Stable per sensor phase, survives restarts
+        phase = random.Random(seed).random() * self.jitter
+        return self.interval.total_seconds() * phase
+
+    def next_delay(self, *, idle_count: int = 0, lag: timedelta | None = None) -> float:
+        if lag is not None and self.catchup_lag is not None and lag > self.catchup_lag:
+            return self.catchup_interval.total_seconds()
+
+        exponent = min(idle_count, 32)  # delay is capped by max_interval anyway
+        delay = self.interval.total_seconds() * self.backoff_factor**exponent
+        return min(delay, max(self.max_interval, self.interval).total_seconds())
+
+
+def async_get_update_semaphore(hass: HomeAssistant) -> asyncio.Semaphore:
+    """Global limit of historical updates running at once"""
+    if (semaphore := hass.data.get(DATA_UPDATE_SEMAPHORE)) is None:
+        semaphore = hass.data[DATA_UPDATE_SEMAPHORE] = asyncio.Semaphore(
+            MAX_CONCURRENT_UPDATES
+        )
+
+    return semaphore
+
+
+def async_get_process_pool(hass: HomeAssistant) -> "ProcessPoolExecutor":
+    """Process pool shared by all historical sensors, created on first use
+
+    Workers are spawned (not forked from HA's multithreaded process) and the
+    pool is shut down when HomeAssistant stops.
+    """
+    if (pool := hass.data.get(DATA_PROCESS_POOL)) is None:
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        pool = hass.data[DATA_PROCESS_POOL] = ProcessPoolExecutor(
+            max_workers=PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+        def _shutdown(_):
+            hass.data.pop(DATA_PROCESS_POOL, None)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _shutdown)
+
+    return pool
@@ -16,23 +16,53 @@
 # USA.
 
 
+from __future__ import annotations
+
+import asyncio
 import logging
+import time
 from abc import abstractmethod
+from bisect import bisect_left, bisect_right
+from collections.abc import Awaitable
 from datetime import datetime, timedelta
 from functools import cached_property
-from typing import Any
+from typing import TYPE_CHECKING, Any, Literal
 
-from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
-from homeassistant.components.recorder.statistics import (
-    StatisticMeanType,
-    StatisticsRow,
-    async_import_statistics,
-)
 from homeassistant.components.sensor import SensorEntity
-from homeassistant.const import STATE_UNKNOWN
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.const import STATE_UNKNOWN, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dtutil
 
 from . import timemachine as tm
+from .calculators import StatisticCalculator, run_calculation
+from .consts import CORRECTION_LOOKBACK, CORRECTION_MAX_LOOKBACK
+from .metrics import SensorMetrics
+from .scheduler import (
+    PollPolicy,
+    async_get_process_pool,
+    async_get_update_semaphore,
+)
+from .watermark import (
+    StatisticWatermark,
+    async_get_rebuild_checkpoint_store,
+    async_get_watermark_store,
+    metadata_fingerprint,
+)
+from .writer import (
+    DEFAULT_CHUNK_SIZE,
+    async_adjust_statistics_sum,
+    async_clear_statistics,
+    async_import_statistics_chunked,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+    from homeassistant.components.recorder.statistics import StatisticsRow
 
 LOGGER = logging.getLogger(__name__)
 
@@ -54,12 +84,44 @@ class HistoricalSensor(SensorEntity):
     Sensors based on HistoricalSensor must provide:
     - self._attr_historical_states
     - self.async_update_historical()
+    - self.async_calculate_statistic_data() or STATISTIC_CALCULATOR
+
+    and optionally:
+    - self.async_load_persisted_data()
     """
 
+    """Calculator used by the default async_calculate_statistic_data"""
+    STATISTIC_CALCULATOR: StatisticCalculator | None = None
+
+    """Statistics are imported (and committed) in chunks of this size"""
+    IMPORT_CHUNK_SIZE: int = DEFAULT_CHUNK_SIZE
+
+    """Re-import blocks changed before the last statistic instead of dropping
+    them (see _async_correct_statistics)"""
+    STATISTICS_CORRECTION_MODE: bool = False
+
+    """Statistic rows calculated, imported and checkpointed at once while
+    rebuilding"""
+    REBUILD_CHUNK_SIZE: int = 50_000
+
+    """With this many states or more, sort, filter and STATISTIC_CALCULATOR
+    run outside the event loop. None to always run them in the loop"""
+    CALCULATION_EXECUTOR_THRESHOLD: int | None = 50_000
+
+    """Where to run offloaded calculations: HA's thread pool or a shared process
+    pool (states are sent as arrays)"""
+    CALCULATION_EXECUTOR: Literal["thread", "process"] = "thread"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self._attr_historical_states: list[tm.HistoricalState] = []
+        self._attr_historical_states: tm.HistoricalStates = []
+        self._startup_task: asyncio.Task | None = None
+        self._startup_timings: dict[str, float] = {}
+        self._historical_fingerprint: dict[int, int] = {}
+        self._historical_metrics = SensorMetrics()
+        self._rebuild_task: asyncio.Task | None = None
+        self._rebuild_progress: dict[str, Any] = {}
 
     @cached_property
     def should_poll(self) -> bool:
@@ -84,7 +146,11 @@ class HistoricalSensor(SensorEntity):
         return STATE_UNKNOWN
 
     @property
-    def historical_states(self) -> list[tm.HistoricalState]:
+    def historical_metrics(self) -> SensorMetrics:
+        return self._historical_metrics
+
+    @property
+    def historical_states(self) -> tm.HistoricalStates:
         if hasattr(self, "_attr_historical_states"):
             return self._attr_historical_states
 
@@ -97,10 +163,20 @@ class HistoricalSensor(SensorEntity):
         This method should be be implemented by sensors
 
         Implement this async method to fetch historical data from provider and store
-        into self._attr_historical_states
+        into self._attr_historical_states, either as a list of HistoricalState or,
+        for large series, as a HistoricalStateArray
         """
         raise NotImplementedError()
 
+    async def async_update_historical_full(self):
+        """async_update_historical_full()
+
+        Same as async_update_historical() but setting the whole history, used by
+        rebuilds. Override it if async_update_historical() only sets the states
+        changed since the last update.
+        """
+        await self.async_update_historical()
+
     async def async_added_to_hass(self):
         await super().async_added_to_hass()
 
@@ -118,51 +194,303 @@ class HistoricalSensor(SensorEntity):
                 + "This is NOT supported, your statistics will be messed sooner or later"
             )
 
-    async def async_write_historical(self):
+        # Don't hold platform setup, do the slow stuff in background
+        self._startup_task = self.hass.async_create_background_task(
+            self._async_startup(), name=f"{self.entity_id} historical startup"
+        )
+
+    async def async_will_remove_from_hass(self) -> None:
+        if self._startup_task and not self._startup_task.done():
+            self._startup_task.cancel()
+
+        # Checkpoint is kept, rebuild will be resumed on next startup
+        if self._rebuild_task and not self._rebuild_task.done():
+            self._rebuild_task.cancel()
+
+    async def async_load_persisted_data(self) -> None:
+        """async_load_persisted_data()
+
+        Override to load sensor's own persisted data (ex. from a Store). It runs
+        in background, before the first historical update.
+        """
+
+    async def _async_startup(self) -> None:
+        await asyncio.gather(
+            self._async_timed_startup_phase("load", self.async_load_persisted_data()),
+            self._async_timed_startup_phase(
+                "watermark",
+                self._async_get_last_statistic(self.get_statistic_metadata()),
+            ),
+        )
+
+        # Resume an interrupted rebuild, start over if metadata changed since
+        statistics_metadata = self.get_statistic_metadata()
+        store = await async_get_rebuild_checkpoint_store(self.hass)
+        checkpoint = store.get(statistics_metadata["statistic_id"])
+        if checkpoint is not None:
+            if checkpoint.metadata_key != metadata_fingerprint(statistics_metadata):
+                checkpoint = None
+            self._async_start_rebuild(checkpoint)
+
+    async def _async_timed_startup_phase(self, phase: str, aw: Awaitable) -> Any:
+        t0 = time.monotonic()
+        try:
+            return await aw
+        finally:
+            self._startup_timings[phase] = time.monotonic() - t0
+            LOGGER.debug(
+                f"{self.entity_id}: startup phase {phase} "
+                + f"took {self._startup_timings[phase]:.3f}s"
+            )
+
+    async def async_write_historical(self) -> list[StatisticData]:
         """async_write_historical()
 
-        This method writes `self.historical_states` into database
+        This method writes `self.historical_states` into database and returns
+        the statistics written
         """
 
         if not self.historical_states:
             LOGGER.debug(f"{self.entity_id}: no historical states available yet")
-            return
+            return []
+
+        if self._rebuild_task and not self._rebuild_task.done():
+            LOGGER.debug(f"{self.entity_id}: rebuild in progress, skipping write")
+            return []
 
         LOGGER.debug(
             f"{self.entity_id}: {len(self.historical_states)} historical states present"
         )
 
+        # Only blocks past the watermark can change statistics, older ones aren't
+        # hashed. Corrections need every block
+        statistics_metadata = self.get_statistic_metadata()
+        since = None
+        if not self.STATISTICS_CORRECTION_MODE:
+            latest = await self._async_get_last_statistic(statistics_metadata)
+            since = self._first_pending_block(latest)
+
+        # Skip the whole write path if nothing changed past the watermark
+        with self._historical_metrics.time("fingerprint"):
+            fingerprint = tm.fingerprint_blocks(
+                self.historical_states, since=since, **self._blockize_kwargs()
+            )
+            changed = [
+                block
+                for block, value in fingerprint.items()
+                if self._historical_fingerprint.get(block) != value
+            ]
+
+        # Blocks seen before with different data are corrections. Blocks never
+        # seen (ex. after a restart) can't be told apart from old data
+        if self.STATISTICS_CORRECTION_MODE:
+            corrected = [b for b in changed if b in self._historical_fingerprint]
+            if corrected:
+                await self._async_correct_statistics(corrected)
+
+            # The correction can move the watermark
+            latest = None
+            if changed:
+                latest = await self._async_get_last_statistic(statistics_metadata)
+
+        if not self._has_changes_past_watermark(changed, latest):
+            self._historical_fingerprint.update(fingerprint)
+            self._historical_metrics.increment("skipped_writes")
+            LOGGER.debug(
+                f"{self.entity_id}: historical states unchanged, skipping write "
+                + f"({self._historical_metrics.counters['skipped_writes']} "
+                + "writes skipped)"
+            )
+            return []
+
         # Write statistics
-        await self._async_write_statistics(self.historical_states)
+        statistics_data = await self._async_write_statistics(self.historical_states)
+        self._historical_fingerprint.update(fingerprint)
+
+        return statistics_data
+
+    def _has_changes_past_watermark(
+        self, changed: list[int], latest: StatisticsRow | None
+    ) -> bool:
+        if not changed:
+            return False
+
+        if (since := self._first_pending_block(latest)) is None:
+            return True
+
+        return max(changed) >= since
+
+    def _first_pending_block(self, latest: StatisticsRow | None) -> int | None:
+        # Same as _async_write_statistics, blocks up to the last statistic are
+        # dropped anyway
+        if latest is None:
+            return None
+
+        return int(latest["start"]) + 1
+
+    async def _async_correct_statistics(self, corrected: list[int]) -> None:
+        """Re-import the window of blocks from the earliest to the latest
+        corrected one, up to the last statistic. Rows after the window keep their
+        `state`, their `sum` is shifted by the difference in bulk.
+        """
+
+        statistics_metadata = self.get_statistic_metadata()
+        latest = await self._async_get_last_statistic(statistics_metadata)
+        if latest is None:
+            return
+
+        corrected = [b for b in corrected if b <= latest["start"]]
+        if not corrected:
+            return
+
+        metrics = self._historical_metrics
+        window_start, window_end = min(corrected), max(corrected)
+
+        with metrics.time("correct", nested=True):
+            with metrics.time("sort"):
+                states = tm.as_state_array(tm.sort_states(self.historical_states))
+                keys = states.block_keys(**self._blockize_kwargs())
+                states = states[
+                    bisect_left(keys, window_start) : bisect_right(keys, window_end)
+                ]
+
+            has_sum = statistics_metadata["has_sum"]
+            base = old_end = None
+            if has_sum:
+                base = await self._async_get_statistic_before(
+                    statistics_metadata, window_start
+                )
+                old_end = await self._async_get_statistic_before(
+                    statistics_metadata, window_end + 1
+                )
+
+            with metrics.time("calculate"):
+                statistics_data = await self.async_calculate_statistic_data(
+                    states, latest=base
+                )
+            with metrics.time("import", executor=True):
+                await async_import_statistics_chunked(
+                    self.hass,
+                    statistics_metadata,
+                    statistics_data,
+                    chunk_size=self.IMPORT_CHUNK_SIZE,
+                )
+
+            delta = 0.0
+            if has_sum and statistics_data:
+                old_sum = (old_end or {}).get("sum") or 0
+                delta = (statistics_data[-1].get("sum") or 0) - old_sum
+
+            if delta and window_end < latest["start"]:
+                await async_adjust_statistics_sum(
+                    self.hass, statistics_metadata, window_end + 1, delta
+                )
+                store = await async_get_watermark_store(self.hass)
+                store.async_set(
+                    statistics_metadata["statistic_id"],
+                    StatisticWatermark(
+                        metadata_key=metadata_fingerprint(statistics_metadata),
+                        start=latest["start"],
+                        sum=(latest.get("sum") or 0) + delta,
+                        state=latest.get("state"),
+                    ),
+                )
+            elif window_end == latest["start"]:
+                await self._async_update_statistic_watermark(
+                    statistics_metadata, statistics_data
+                )
+
+        metrics.increment("corrections")
+        metrics.increment("rows_corrected", len(statistics_data))
+        LOGGER.info(
+            f"{self.entity_id}: corrected {len(statistics_data)} statistics points "
+            + f"from {dtutil.utc_from_timestamp(window_start)} "
+            + f"to {dtutil.utc_from_timestamp(window_end)}, sum shifted by {delta}"
+        )
+
+    async def _async_get_statistic_before(
+        self, statistics_metadata: StatisticMetaData, ts: float
+    ) -> StatisticsRow | None:
+        # Look for the closest row before ts, widening the lookback until a row
+        # is found or there is (most likely) nothing before
+        lookback = CORRECTION_LOOKBACK
+        while True:
+            rows = await tm.hass_get_statistics_period(
+                self.hass, statistics_metadata, ts - lookback, ts, types={"sum"}
+            )
+            if rows:
+                return rows[-1]
+
+            if lookback >= CORRECTION_MAX_LOOKBACK:
+                return None
+
+            lookback *= 2
+
+    def _blockize_kwargs(self) -> dict[str, Any]:
+        if (calculator := self.STATISTIC_CALCULATOR) is None:
+            return {}
+
+        return {
+            "granularity": calculator.granularity,
+            "border_in_previous_block": calculator.border_in_previous_block,
+        }
 
     async def _async_write_statistics(
-        self, hist_states: list[tm.HistoricalState]
+        self, hist_states: tm.HistoricalStates
     ) -> list[StatisticData]:
         if not hist_states:
             return []
 
-        hist_states = list(sorted(hist_states, key=lambda x: x.timestamp))
+        metrics = self._historical_metrics
+        metrics.increment("points_in", len(hist_states))
 
         statistics_metadata = self.get_statistic_metadata()
-        latest_statistic_data = await tm.hass_get_last_statistic(
-            self.hass, statistics_metadata
+        latest_statistic_data = await self._async_get_last_statistic(
+            statistics_metadata
         )
 
         #
-        # Handle overlaping stats.
+        # Handle overlaping stats: blocks up to the last statistic are written
         #
 
+        after_block = None
         if latest_statistic_data is not None:
-            cutoff = latest_statistic_data["start"] + 60 * 60
-            hist_states = [x for x in hist_states if x.timestamp > cutoff]
+            after_block = int(latest_statistic_data["start"])
 
-        #
-        # Calculate stats
-        #
-        statistics_data = await self.async_calculate_statistic_data(
-            hist_states, latest=latest_statistic_data
+        if self._use_calculation_executor(len(hist_states)):
+            statistics_data = await self._async_calculate_in_executor(
+                hist_states, after_block, latest_statistic_data
+            )
+
+        else:
+            with metrics.time("sort"):
+                hist_states = tm.sort_states(hist_states)
+
+            if after_block is not None:
+                with metrics.time("filter"):
+                    hist_states = tm.states_after_block(
+                        hist_states, after_block, **self._blockize_kwargs()
+                    )
+
+            #
+            # Calculate stats
+            #
+            with metrics.time("calculate"):
+                statistics_data = await self.async_calculate_statistic_data(
+                    hist_states, latest=latest_statistic_data
+                )
+
+        with metrics.time("import", executor=True):
+            await async_import_statistics_chunked(
+                self.hass,
+                statistics_metadata,
+                statistics_data,
+                chunk_size=self.IMPORT_CHUNK_SIZE,
+            )
+        metrics.increment("rows_out", len(statistics_data))
+        await self._async_update_statistic_watermark(
+            statistics_metadata, statistics_data
         )
-        async_import_statistics(self.hass, statistics_metadata, statistics_data)
 
         n_statistics_data = len(statistics_data)
         LOGGER.info(f"{self.entity_id}: added {n_statistics_data} statistics points")
@@ -171,11 +499,271 @@ class HistoricalSensor(SensorEntity):
 
         return statistics_data
 
+    def _use_calculation_executor(self, n_states: int) -> bool:
+        # Only the default calculation can be offloaded, an overriden
+        # async_calculate_statistic_data is a coroutine bound to the loop
+        threshold = self.CALCULATION_EXECUTOR_THRESHOLD
+        return (
+            threshold is not None
+            and n_states >= threshold
+            and self.STATISTIC_CALCULATOR is not None
+            and type(self).async_calculate_statistic_data
+            is HistoricalSensor.async_calculate_statistic_data
+        )
+
+    async def _async_calculate_in_executor(
+        self,
+        hist_states: tm.HistoricalStates,
+        after_block: int | None,
+        latest: StatisticsRow | None,
+    ) -> list[StatisticData]:
+        metrics = self._historical_metrics
+
+        with metrics.time("calculate_executor", executor=True):
+            if self.CALCULATION_EXECUTOR == "process":
+                # Convert (ex. a list) in a thread, only arrays are pickled
+                states = await self.hass.async_add_executor_job(
+                    tm.as_state_array, hist_states
+                )
+                statistics_data, elapsed = await self.hass.loop.run_in_executor(
+                    async_get_process_pool(self.hass),
+                    run_calculation,
+                    self.STATISTIC_CALCULATOR,
+                    states,
+                    after_block,
+                    latest,
+                )
+            else:
+                statistics_data, elapsed = await self.hass.async_add_executor_job(
+                    run_calculation,
+                    self.STATISTIC_CALCULATOR,
+                    hist_states,
+                    after_block,
+                    latest,
+                )
+
+        # Time the calculation would have blocked the event loop, already
+        # counted by calculate_executor
+        metrics.record("loop_time_saved", elapsed, executor=True, nested=True)
+        LOGGER.debug(
+            f"{self.entity_id}: calculated {len(hist_states)} states in "
+            + f"{self.CALCULATION_EXECUTOR} executor, {elapsed * 1000:.1f}ms of "
+            + "event loop time saved"
+        )
+
+        return statistics_data
+
+    async def _async_get_last_statistic(
+        self, statistics_metadata: StatisticMetaData
+    ) -> StatisticsRow | None:
+        # Use the cached watermark if it matches current metadata, query the
+        # recorder otherwise.
+
+        store = await async_get_watermark_store(self.hass)
+        statistic_id = statistics_metadata["statistic_id"]
+        metadata_key = metadata_fingerprint(statistics_metadata)
+
+        watermark = store.get(statistic_id)
+        if watermark is not None and watermark.metadata_key == metadata_key:
+            self._historical_metrics.increment("watermark_hits")
+            return watermark.as_statistics_row()
+
+        LOGGER.debug(f"{self.entity_id}: no valid watermark, querying recorder")
+        self._historical_metrics.increment("watermark_misses")
+        with self._historical_metrics.time("last_statistic", executor=True):
+            latest = await tm.hass_get_last_statistic(self.hass, statistics_metadata)
+        store.async_set(
+            statistic_id, StatisticWatermark.from_statistics_row(metadata_key, latest)
+        )
+
+        return latest
+
+    async def _async_update_statistic_watermark(
+        self,
+        statistics_metadata: StatisticMetaData,
+        statistics_data: list[StatisticData],
+    ) -> None:
+        watermark = StatisticWatermark.from_statistic_data(
+            metadata_fingerprint(statistics_metadata), statistics_data
+        )
+        if watermark is None:
+            return
+
+        store = await async_get_watermark_store(self.hass)
+        store.async_set(statistics_metadata["statistic_id"], watermark)
+
+    async def async_get_last_statistic_start(self) -> float | None:
+        """async_get_last_statistic_start()
+
+        Start (epoch seconds) of the last statistic row written, None if there
+        are no statistics yet. Sensors with their own storage (ex. a
+        HistoricalJournal) can load only states after it.
+        """
+        latest = await self._async_get_last_statistic(self.get_statistic_metadata())
+        return latest["start"] if latest else None
+
+    async def async_invalidate_statistic_watermark(self) -> None:
+        """async_invalidate_statistic_watermark()
+
+        Forget the cached last statistic, next write will query the recorder.
+        Call this if statistics were modified outside of this sensor.
+        """
+        store = await async_get_watermark_store(self.hass)
+        store.async_invalidate(self.get_statistic_metadata()["statistic_id"])
+
+    async def async_rebuild_statistics(self) -> None:
+        """async_rebuild_statistics()
+
+        Clear the statistic and regenerate it from the whole history, in
+        background. Progress is checkpointed after each chunk, an interrupted
+        rebuild is resumed on next startup.
+        """
+        if self._rebuild_task and not self._rebuild_task.done():
+            LOGGER.warning(f"{self.entity_id}: rebuild already in progress")
+            return
+
+        self._async_start_rebuild(None)
+
+    @callback
+    def _async_start_rebuild(self, checkpoint: StatisticWatermark | None) -> None:
+        self._rebuild_task = self.hass.async_create_background_task(
+            self._async_rebuild_statistics(checkpoint),
+            name=f"{self.entity_id} statistics rebuild",
+        )
+
+    async def _async_rebuild_statistics(
+        self, checkpoint: StatisticWatermark | None
+    ) -> None:
+        statistics_metadata = self.get_statistic_metadata()
+        statistic_id = statistics_metadata["statistic_id"]
+        metadata_key = metadata_fingerprint(statistics_metadata)
+        store = await async_get_rebuild_checkpoint_store(self.hass)
+        metrics = self._historical_metrics
+
+        t0 = time.monotonic()
+        progress = self._rebuild_progress = {
+            "status": "running",
+            "started": dtutil.utcnow().isoformat(),
+            "resumed": checkpoint is not None,
+            "rows": 0,
+            "total": None,
+            "rows_per_minute": None,
+        }
+
+        try:
+            if checkpoint is None:
+                LOGGER.info(f"{self.entity_id}: rebuilding statistics from scratch")
+                await async_clear_statistics(self.hass, statistics_metadata)
+                checkpoint = StatisticWatermark(metadata_key=metadata_key)
+                store.async_set(statistic_id, checkpoint)
+                await store.async_save()
+            else:
+                LOGGER.info(
+                    f"{self.entity_id}: resuming statistics rebuild after "
+                    + f"{dtutil.utc_from_timestamp(checkpoint.start or 0)}"
+                )
+
+            watermarks = await async_get_watermark_store(self.hass)
+            watermarks.async_invalidate(statistic_id)
+            self._historical_fingerprint.clear()
+
+            with metrics.time("fetch", io=True):
+                await self.async_update_historical_full()
+
+            # Only blocks after the checkpoint, groups are computed once for the
+            # whole history and then walked in chunks
+            states = tm.as_state_array(tm.sort_states(self.historical_states))
+            keys = states.block_keys(**self._blockize_kwargs())
+            latest = checkpoint.as_statistics_row()
+            offset = bisect_right(keys, latest["start"]) if latest else 0
+            states, keys = states[offset:], keys[offset:]
+            _, groups = tm.group_slices(keys)
+            progress["total"] = len(groups)
+
+            for idx in range(0, len(groups), self.REBUILD_CHUNK_SIZE):
+                chunk = groups[idx : idx + self.REBUILD_CHUNK_SIZE]
+                chunk_states = states[chunk[0][1].start : chunk[-1][1].stop]
+
+                if self._use_calculation_executor(len(chunk_states)):
+                    statistics_data = await self._async_calculate_in_executor(
+                        chunk_states, None, latest
+                    )
+                else:
+                    with metrics.time("rebuild_calculate"):
+                        statistics_data = await self.async_calculate_statistic_data(
+                            chunk_states, latest=latest
+                        )
+                with metrics.time("rebuild_import", executor=True):
+                    await async_import_statistics_chunked(
+                        self.hass,
+                        statistics_metadata,
+                        statistics_data,
+                        chunk_size=self.REBUILD_CHUNK_SIZE,
+                    )
+
+                if (
+                    chunk_checkpoint := StatisticWatermark.from_statistic_data(
+                        metadata_key, statistics_data
+                    )
+                ) is not None:
+                    checkpoint = chunk_checkpoint
+                    store.async_set(statistic_id, checkpoint)
+                    await store.async_save()
+                    latest = checkpoint.as_statistics_row()
+
+                progress["rows"] += len(statistics_data)
+                progress["rows_per_minute"] = round(
+                    progress["rows"] * 60 / (time.monotonic() - t0)
+                )
+                metrics.increment("rows_rebuilt", len(statistics_data))
+                LOGGER.info(
+                    f"{self.entity_id}: rebuild {progress['rows']}/{progress['total']}"
+                    + f" rows ({progress['rows_per_minute']} rows/min)"
+                )
+
+        except Exception:
+            progress["status"] = "failed"
+            LOGGER.exception(f"{self.entity_id}: statistics rebuild failed")
+            return
+
+        store.async_invalidate(statistic_id)
+        await store.async_save()
+        if checkpoint.start is not None:
+            watermarks.async_set(statistic_id, checkpoint)
+        self._historical_fingerprint.update(
+            tm.fingerprint_blocks(self.historical_states, **self._blockize_kwargs())
+        )
+
+        progress["status"] = "done"
+        LOGGER.info(
+            f"{self.entity_id}: statistics rebuild done, {progress['rows']} rows "
+            + f"in {time.monotonic() - t0:.1f}s"
+        )
+
+    def get_historical_diagnostics(self) -> dict[str, Any]:
+        """Performance metrics and internal state, for diagnostics"""
+        return {
+            "entity_id": self.entity_id,
+            "historical_states": len(self.historical_states),
+            "startup": dict(self._startup_timings),
+            "metrics": self._historical_metrics.as_dict(),
+            "rebuild": dict(self._rebuild_progress),
+        }
+
     def get_statistic_metadata(self) -> StatisticMetaData:
+        from homeassistant.components.recorder.models import StatisticMetaData
+        from homeassistant.components.recorder.statistics import StatisticMeanType
+
+        calculator = self.STATISTIC_CALCULATOR
+
         metadata = StatisticMetaData(
             # has_mean=False,
-            has_sum=False,
-            mean_type=StatisticMeanType.NONE,
+            has_sum=calculator.has_sum if calculator else False,
+            mean_type=(
+                StatisticMeanType.ARITHMETIC
+                if calculator and calculator.has_mean
+                else StatisticMeanType.NONE
+            ),
             name=f"{self.name} Statistics",
             source="recorder",
             statistic_id=self.entity_id,
@@ -187,11 +775,14 @@ class HistoricalSensor(SensorEntity):
 
     async def async_calculate_statistic_data(
         self,
-        hist_states: list[tm.HistoricalState],
+        hist_states: tm.HistoricalStates,
         *,
         latest: StatisticsRow | None = None,
     ) -> list[StatisticData]:
-        raise NotImplementedError()
+        if self.STATISTIC_CALCULATOR is None:
+            raise NotImplementedError()
+
+        return self.STATISTIC_CALCULATOR.calculate(hist_states, latest=latest)
 
 
 class PollUpdateMixin(HistoricalSensor):
@@ -200,8 +791,10 @@ class PollUpdateMixin(HistoricalSensor):
     This mixin provides:
 
       - UPDATE_INTERVAL: timedelta
+      - get_poll_policy(self)
       - async_added_to_hass(self)
       - async_will_remove_from_hass(self)
+      - async_request_historical_update(self)
       - _async_historical_handle_update(self)
     """
 
@@ -211,32 +804,152 @@ class PollUpdateMixin(HistoricalSensor):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._remove_time_tracker_fn = None
-
-    async def async_added_to_hass(self) -> None:
-        """Once added to hass:
-        - Setup internal stuff with the Store to hold internal state
+        self._poll_idle_count = 0
+        self._poll_stopped = False
+
+        # Single flight updates, see _async_historical_handle_update
+        self._update_lock = asyncio.Lock()
+        self._update_runs = 0
+        self._update_last_result: list[StatisticData] = []
+
+    def get_poll_policy(self) -> PollPolicy:
+        """Override to customize scheduling, ex. from config entry options"""
+        return PollPolicy(interval=self.UPDATE_INTERVAL)
+
+    async def _async_startup(self) -> None:
+        """Once added to hass (in background):
+        - Load persisted data and last statistic
+        - Do the initial update
         - Setup a peridioc call to update the entity
         """
 
-        await super().async_added_to_hass()
+        # A failure here (ex. the provider is down at boot) must not leave the
+        # sensor without polls until the next restart
+        try:
+            await super()._async_startup()
 
-        LOGGER.debug(f"{self.entity_id}: added to hass, do initial update")
-        await self._async_historical_handle_update()
-        self._remove_time_tracker_fn = async_track_time_interval(
-            self.hass,
-            self._async_historical_handle_update,
-            self.UPDATE_INTERVAL,
-        )
+            LOGGER.debug(f"{self.entity_id}: added to hass, do initial update")
+            async with async_get_update_semaphore(self.hass):
+                await self._async_timed_startup_phase(
+                    "initial_update", self._async_historical_handle_update()
+                )
+
+        except Exception:
+            LOGGER.exception(f"{self.entity_id}: startup failed, polling anyway")
+
+        policy = self.get_poll_policy()
+        self._async_schedule_poll(policy.initial_delay(self.entity_id))
 
         LOGGER.debug(
             f"{self.entity_id}: "
-            + f"updating each {self.UPDATE_INTERVAL.total_seconds()} seconds "
+            + f"updating each {policy.interval.total_seconds()} seconds "
         )
 
     async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+
+        self._poll_stopped = True
         if self._remove_time_tracker_fn:
             self._remove_time_tracker_fn()
+            self._remove_time_tracker_fn = None
 
-    async def _async_historical_handle_update(self, _: datetime | None = None) -> None:
-        await self.async_update_historical()
-        await self.async_write_historical()
+    @callback
+    def _async_schedule_poll(self, delay: float) -> None:
+        if self._poll_stopped:
+            return
+
+        LOGGER.debug(f"{self.entity_id}: next update in {delay:.0f} seconds")
+        self._remove_time_tracker_fn = async_call_later(
+            self.hass, delay, self._async_poll
+        )
+
+    async def _async_poll(self, _: datetime) -> None:
+        self._remove_time_tracker_fn = None
+        policy = self.get_poll_policy()
+
+        statistics_data: list[StatisticData] = []
+        try:
+            async with async_get_update_semaphore(self.hass):
+                statistics_data = await self._async_historical_handle_update()
+
+        finally:
+            if statistics_data:
+                self._poll_idle_count = 0
+                lag = dtutil.utcnow() - max(x["start"] for x in statistics_data)
+            else:
+                self._poll_idle_count += 1
+                lag = None
+
+            self._async_schedule_poll(
+                policy.next_delay(idle_count=self._poll_idle_count, lag=lag)
+            )
+
+    async def async_request_historical_update(self) -> list[StatisticData]:
+        """async_request_historical_update()
+
+        Fetch and write historical data now (ex. from a service call). If an
+        update is already running it is coalesced into a single follow-up one.
+        """
+        return await self._async_historical_handle_update()
+
+    async def _async_historical_handle_update(
+        self, _: datetime | None = None
+    ) -> list[StatisticData]:
+        # Only one update runs at a time, overlapping runs would read the same
+        # last statistic and import duplicated sums. Triggers arriving while an
+        # update runs wait for one follow-up update that covers all of them.
+        target = self._update_runs + 1
+
+        metrics = self._historical_metrics
+        async with self._update_lock:
+            if self._update_runs >= target:
+                metrics.increment("coalesced_updates")
+                return self._update_last_result
+
+            self._update_runs += 1
+            self._update_last_result = []
+
+            with metrics.time("update", nested=True):
+                with metrics.time("fetch", io=True):
+                    await self.async_update_historical()
+
+                self._update_last_result = await self.async_write_historical()
+
+            return self._update_last_result
+
+
+class HistoricalMetricsSensor(SensorEntity):
+    """Diagnostic sensor with the p95 update latency of a historical sensor
+
+    Per phase metrics are exposed as attributes. Disabled by default.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_should_poll = True
+
+    def __init__(self, historical_sensor: HistoricalSensor):
+        super().__init__()
+
+        self._historical_sensor = historical_sensor
+        self._attr_name = f"{historical_sensor.name} update latency"
+        if historical_sensor.unique_id:
+            self._attr_unique_id = f"{historical_sensor.unique_id}_update_latency"
+
+    async def async_update(self) -> None:
+        metrics = self._historical_sensor.historical_metrics
+
+        attributes: dict[str, Any] = dict(metrics.counters)
+        for phase, phase_metrics in metrics.phases.items():
+            attributes[f"{phase}_count"] = phase_metrics.count
+            attributes[f"{phase}_p50_ms"] = _as_ms(phase_metrics.percentile(50))
+            attributes[f"{phase}_p95_ms"] = _as_ms(phase_metrics.percentile(95))
+
+        update = metrics.phases.get("update")
+        self._attr_native_value = _as_ms(update.percentile(95)) if update else None
+        self._attr_extra_state_attributes = attributes
+
+
+def _as_ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
@@ -1,29 +1,54 @@
 #!/usr/bin/env python3
 
+from __future__ import annotations
+
+import asyncio
 import functools
+import heapq
 import itertools
 import logging
-from collections.abc import Iterator
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator, Sequence
 from dataclasses import asdict, dataclass, field
 from math import ceil
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, Literal
 
-from homeassistant.components import recorder
-from homeassistant.components.recorder.models import StatisticMetaData
-from homeassistant.components.recorder.statistics import (
-    StatisticsRow,
-    get_last_statistics,
-)
 from homeassistant.const import MAJOR_VERSION, MINOR_VERSION
 from homeassistant.const import __version__ as HA_FULL_VERSION
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dtutil
+
+from .consts import (
+    DATA_LAST_STATISTIC_BATCHER,
+    LAST_STATISTIC_BATCH_WINDOW,
+    MIN_REQ_MAJOR_VERSION,
+    MIN_REQ_MINOR_VERSION,
+)
 
-from .consts import MIN_REQ_MAJOR_VERSION, MIN_REQ_MINOR_VERSION
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import StatisticMetaData
+    from homeassistant.components.recorder.statistics import StatisticsRow
 
 LOGGER = logging.getLogger(__name__)
 
 
-@dataclass
+@functools.cache
+def get_numpy() -> Any:
+    """NumPy module, imported on first use, or None if it's not available"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+class OutOfOrderStateError(ValueError):
+    pass
+
+
+@dataclass(slots=True)
 class HistoricalState:
     state: Any
     timestamp: float
@@ -33,12 +58,642 @@ class HistoricalState:
         return asdict(self)
 
 
+class HistoricalStateArray:
+    """Columnar sequence of historical states
+
+    Holds timestamps as int64 epoch seconds, states as float64 and attributes as
+    an index into a table of shared dicts. Iterating or indexing creates
+    HistoricalState objects on demand, slicing returns a view (no copy).
+
+    Attribute dicts are shared between states, don't modify them.
+    """
+
+    __slots__ = (
+        "timestamps",
+        "states",
+        "attributes_index",
+        "attributes_table",
+        "_block_keys",
+        "_lazy",
+    )
+
+    def __init__(
+        self,
+        timestamps: Iterable[int] = (),
+        states: Iterable[float] = (),
+        attributes_index: Iterable[int] | None = None,
+        attributes_table: list[dict[str, Any]] | None = None,
+    ):
+        self.timestamps = _as_array("q", timestamps)
+        self.states = _as_array("d", states)
+        if len(self.timestamps) != len(self.states):
+            raise ValueError("timestamps and states must have the same length")
+
+        self.attributes_table = attributes_table or [{}]
+        if attributes_index is None:
+            self.attributes_index = array("I", [0]) * len(self.timestamps)
+        else:
+            self.attributes_index = _as_array("I", attributes_index)
+
+        self._block_keys: dict[tuple[int, bool], Sequence[int]] = {}
+
+    @classmethod
+    def from_states(cls, states: Iterable[HistoricalState]) -> "HistoricalStateArray":
+        timestamps = array("q")
+        values = array("d")
+        index = array("I")
+        table: list[dict[str, Any]] = [{}]
+        interned: dict[Any, int] = {_attributes_key(table[0]): 0}
+
+        for state in states:
+            key = _attributes_key(state.attributes)
+            if (idx := interned.get(key)) is None:
+                idx = interned[key] = len(table)
+                table.append(state.attributes)
+
+            timestamps.append(ceil(state.timestamp))
+            values.append(state.state)
+            index.append(idx)
+
+        return cls(timestamps, values, index, table)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __reduce__(self):
+        # Views (memoryviews) can't be pickled, send plain array copies. Used to
+        # hand states to a process pool.
+        return (
+            HistoricalStateArray,
+            (
+                array("q", bytes(self.timestamps)),
+                array("d", bytes(self.states)),
+                array("I", bytes(self.attributes_index)),
+                self.attributes_table,
+            ),
+        )
+
+    def __iter__(self) -> Iterator[HistoricalState]:
+        table = self.attributes_table
+        for ts, value, idx in zip(self.timestamps, self.states, self.attributes_index):
+            yield HistoricalState(state=value, timestamp=ts, attributes=table[idx])
+
+    def __getattr__(self, name):
+        # Only reached for unset slots: columns of a lazy view (see `_lazy_view`)
+        # are sliced from the parent on first access
+        if name == "_lazy":
+            raise AttributeError(name)
+
+        parent, key = self._lazy
+        del self._lazy
+        self._set_view_columns(parent, key)
+
+        return object.__getattribute__(self, name)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            view = object.__new__(HistoricalStateArray)
+            view._set_view_columns(self, key)
+            return view
+
+        return HistoricalState(
+            state=self.states[key],
+            timestamp=self.timestamps[key],
+            attributes=self.attributes_table[self.attributes_index[key]],
+        )
+
+    def __repr__(self) -> str:
+        return f"<HistoricalStateArray len={len(self)}>"
+
+    def is_sorted(self) -> bool:
+        return _is_monotonic(self.timestamps)
+
+    def _set_view_columns(self, parent: "HistoricalStateArray", key: slice) -> None:
+        # Columns are already validated in parent, skip __init__
+        self.timestamps = memoryview(parent.timestamps)[key]
+        self.states = memoryview(parent.states)[key]
+        self.attributes_index = memoryview(parent.attributes_index)[key]
+        self.attributes_table = parent.attributes_table
+        self._block_keys = {}
+
+    def _lazy_view(self, key: slice) -> "HistoricalStateArray":
+        # View with no columns yet, just the parent and the slice. Costs one
+        # object instead of three memoryviews, group_by_interval creates one per
+        # block.
+        view = object.__new__(HistoricalStateArray)
+        view._lazy = (self, key)
+        return view
+
+    def sorted(self) -> "HistoricalStateArray":
+        if self.is_sorted():
+            return self
+
+        return self.take(sorted(range(len(self)), key=self.timestamps.__getitem__))
+
+    def take(self, indices: Iterable[int]) -> "HistoricalStateArray":
+        if (np := get_numpy()) is not None:
+            idx = np.asarray(indices, dtype=np.intp)
+            return HistoricalStateArray(
+                np.asarray(self.timestamps)[idx],
+                np.asarray(self.states)[idx],
+                np.asarray(self.attributes_index)[idx],
+                self.attributes_table,
+            )
+
+        indices = list(indices)
+        return HistoricalStateArray(
+            array("q", [self.timestamps[i] for i in indices]),
+            array("d", [self.states[i] for i in indices]),
+            array("I", [self.attributes_index[i] for i in indices]),
+            self.attributes_table,
+        )
+
+    def after(self, cutoff: float) -> "HistoricalStateArray":
+        """States with timestamp > cutoff. Array must be sorted"""
+        return self[bisect_right(self.timestamps, cutoff) :]
+
+    def block_keys(
+        self, *, granularity: int = 60 * 60, border_in_previous_block: bool = True
+    ) -> Sequence[int]:
+        """Block (as in `blockize`) for each state, computed once and cached"""
+        cache_key = (granularity, border_in_previous_block)
+        if (keys := self._block_keys.get(cache_key)) is None:
+            keys = self._block_keys[cache_key] = block_keys(
+                self.timestamps,
+                granularity=granularity,
+                border_in_previous_block=border_in_previous_block,
+            )
+
+        return keys
+
+
+class HistoricalTimeline:
+    """Historical states kept sorted by timestamp
+
+    New states are merged in on insert instead of re-sorting everything, a state
+    with the same timestamp as an existing one replaces it. Queries use binary
+    search and return HistoricalStateArray views, no data is copied.
+    """
+
+    def __init__(self, states: Iterable[HistoricalState] = ()):
+        self._timestamps = array("q")
+        self._states = array("d")
+        self._attributes_index = array("I")
+        self._attributes_table: list[dict[str, Any]] = [{}]
+        self._interned: dict[Any, int] = {_attributes_key({}): 0}
+
+        self.insert(states)
+
+    def __len__(self) -> int:
+        return len(self._timestamps)
+
+    def __iter__(self) -> Iterator[HistoricalState]:
+        return iter(self.view())
+
+    def __repr__(self) -> str:
+        return f"<HistoricalTimeline len={len(self)}>"
+
+    @property
+    def last_timestamp(self) -> int | None:
+        return self._timestamps[-1] if self._timestamps else None
+
+    def insert(self, states: Iterable[HistoricalState]) -> int | None:
+        """Merge states into the timeline
+
+        Returns the position of the first modified state or None if nothing was
+        inserted
+        """
+
+        # Sort new states only (last one wins on duplicated timestamps)
+        incoming = {}
+        for state in states:
+            incoming[ceil(state.timestamp)] = (
+                float(state.state),
+                self._intern_attributes(state.attributes),
+            )
+
+        if not incoming:
+            return None
+
+        new = sorted(incoming.items())
+        pos = bisect_left(self._timestamps, new[0][0])
+
+        if pos == len(self._timestamps):
+            merged = new
+
+        else:
+            old = zip(
+                self._timestamps[pos:],
+                zip(self._states[pos:], self._attributes_index[pos:]),
+            )
+            merged = list(_merge_sorted_unique(old, new))
+
+        self._timestamps = _splice(self._timestamps, pos, [x[0] for x in merged])
+        self._states = _splice(self._states, pos, [x[1][0] for x in merged])
+        self._attributes_index = _splice(
+            self._attributes_index, pos, [x[1][1] for x in merged]
+        )
+
+        return pos
+
+    def view(self, start: int = 0, stop: int | None = None) -> HistoricalStateArray:
+        return HistoricalStateArray(
+            memoryview(self._timestamps)[start:stop],
+            memoryview(self._states)[start:stop],
+            memoryview(self._attributes_index)[start:stop],
+            self._attributes_table,
+        )
+
+    def copy(self, start: int = 0, stop: int | None = None) -> HistoricalStateArray:
+        """Like view() but copying the data
+
+        Views block resizing the timeline, any insert while one is alive copies
+        the whole timeline. Use copies for states kept around (ex. as
+        historical states of a sensor).
+        """
+        return HistoricalStateArray(
+            self._timestamps[start:stop],
+            self._states[start:stop],
+            self._attributes_index[start:stop],
+            self._attributes_table,
+        )
+
+    def after(self, cutoff: float) -> HistoricalStateArray:
+        """States with timestamp > cutoff"""
+        return self.view(bisect_right(self._timestamps, cutoff))
+
+    def range(self, start: float, end: float) -> HistoricalStateArray:
+        """States with start <= timestamp < end"""
+        return self.view(
+            bisect_left(self._timestamps, start), bisect_left(self._timestamps, end)
+        )
+
+    def _intern_attributes(self, attributes: dict[str, Any]) -> int:
+        key = _attributes_key(attributes)
+        if (idx := self._interned.get(key)) is None:
+            idx = self._interned[key] = len(self._attributes_table)
+            self._attributes_table.append(attributes)
+
+        return idx
+
+
+HistoricalStates = list[HistoricalState] | HistoricalStateArray | HistoricalTimeline
+
+
+def _splice(arr: array, pos: int, values: list) -> array:
+    # Replace arr[pos:] with values. If there are views (memoryviews) over the
+    # array it can't be resized, in that case work on a copy and leave the views
+    # with the old data.
+    try:
+        del arr[pos:]
+        arr.extend(values)
+    except BufferError:
+        arr = arr[:pos]
+        arr.extend(values)
+
+    return arr
+
+
+def _merge_sorted_unique(old: Iterable, new: Iterable) -> Iterator:
+    # Merge two sequences of (key, value) sorted by key, on equal keys the one
+    # from `new` wins
+    prev = None
+    for item in heapq.merge(((k, 0, v) for k, v in old), ((k, 1, v) for k, v in new)):
+        if prev is not None and prev[0] != item[0]:
+            yield prev[0], prev[2]
+        prev = item
+
+    if prev is not None:
+        yield prev[0], prev[2]
+
+
+def _as_array(typecode: str, values: Iterable) -> Any:
+    # Keep arrays and memoryviews (slices) with the right type as-is, no copy
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    if isinstance(values, memoryview) and values.format == typecode:
+        return values
+    np = get_numpy()
+    if np is not None and isinstance(values, np.ndarray):
+        return array(typecode, values.astype(typecode, copy=False).tobytes())
+
+    return array(typecode, values)
+
+
+def _is_monotonic(values: Sequence[float]) -> bool:
+    if (np := get_numpy()) is not None:
+        return bool((np.diff(np.asarray(values)) >= 0).all())
+
+    return all(a <= b for a, b in itertools.pairwise(values))
+
+
+def _attributes_key(attributes: dict[str, Any]) -> Any:
+    try:
+        return frozenset(attributes.items())
+    except TypeError:
+        return id(attributes)
+
+
+def as_state_array(historical_states: HistoricalStates) -> HistoricalStateArray:
+    if isinstance(historical_states, HistoricalTimeline):
+        return historical_states.view()
+
+    if isinstance(historical_states, HistoricalStateArray):
+        return historical_states
+
+    return HistoricalStateArray.from_states(historical_states)
+
+
+def sort_states(historical_states: HistoricalStates) -> HistoricalStates:
+    if isinstance(historical_states, HistoricalTimeline):
+        return historical_states.view()
+
+    if isinstance(historical_states, HistoricalStateArray):
+        return historical_states.sorted()
+
+    return sorted(historical_states, key=lambda x: x.timestamp)
+
+
+def states_after(
+    historical_states: HistoricalStates, cutoff: float
+) -> HistoricalStates:
+    """States with timestamp > cutoff. historical_states must be sorted"""
+
+    if isinstance(historical_states, HistoricalStateArray | HistoricalTimeline):
+        return historical_states.after(cutoff)
+
+    idx = bisect_right(historical_states, cutoff, key=lambda x: x.timestamp)
+    return historical_states[idx:]
+
+
+def states_after_block(
+    historical_states: HistoricalStates, block: int, **blockize_kwargs
+) -> HistoricalStates:
+    """States belonging to blocks after `block`. historical_states must be
+    sorted"""
+
+    if isinstance(historical_states, HistoricalTimeline):
+        historical_states = historical_states.view()
+
+    if isinstance(historical_states, HistoricalStateArray):
+        keys = historical_states.block_keys(**blockize_kwargs)
+        return historical_states[bisect_right(keys, block) :]
+
+    idx = bisect_right(
+        historical_states, block, key=lambda x: blockize(x, **blockize_kwargs)
+    )
+    return historical_states[idx:]
+
+
 def group_by_interval(
-    historical_states: list[HistoricalState], **blockize_kwargs
+    historical_states: HistoricalStates, **blockize_kwargs
 ) -> Iterator[Any]:
-    fn = functools.partial(blockize, **blockize_kwargs)
-    sorted_states = sorted(historical_states, key=fn)
-    yield from itertools.groupby(sorted_states, key=fn)
+    if isinstance(historical_states, HistoricalTimeline):
+        historical_states = historical_states.view()
+
+    if isinstance(historical_states, HistoricalStateArray):
+        order, groups = group_slices(historical_states.block_keys(**blockize_kwargs))
+        if order is not None:
+            historical_states = historical_states.take(order)
+
+        for block, block_slice in groups:
+            yield block, historical_states._lazy_view(block_slice)
+
+        return
+
+    states = list(historical_states)
+    order, groups = group_slices(
+        block_keys([x.timestamp for x in states], **blockize_kwargs)
+    )
+    if order is not None:
+        states = [states[idx] for idx in order]
+
+    for block, block_slice in groups:
+        yield block, iter(states[block_slice])
+
+
+def group_by_interval_streaming(
+    historical_states: Iterable[HistoricalState],
+    *,
+    reorder_buffer: int = 0,
+    **blockize_kwargs,
+) -> Iterator[tuple[int, list[HistoricalState]]]:
+    """Group an iterable of states sorted by timestamp
+
+    Blocks are yielded as soon as a state from the next block is seen, so memory
+    usage is bounded by the size of a block. Slightly unordered input can be
+    handled with a reorder buffer of `reorder_buffer` states, otherwise
+    OutOfOrderStateError is raised.
+    """
+
+    grouper = _StreamingGrouper(reorder_buffer=reorder_buffer, **blockize_kwargs)
+    for state in historical_states:
+        yield from grouper.push(state)
+
+    yield from grouper.flush()
+
+
+async def async_group_by_interval_streaming(
+    historical_states: AsyncIterable[HistoricalState],
+    *,
+    reorder_buffer: int = 0,
+    **blockize_kwargs,
+) -> AsyncIterator[tuple[int, list[HistoricalState]]]:
+    """Async version of `group_by_interval_streaming`"""
+
+    grouper = _StreamingGrouper(reorder_buffer=reorder_buffer, **blockize_kwargs)
+    async for state in historical_states:
+        for group in grouper.push(state):
+            yield group
+
+    for group in grouper.flush():
+        yield group
+
+
+class _StreamingGrouper:
+    def __init__(self, *, reorder_buffer: int = 0, **blockize_kwargs):
+        self._blockize_kwargs = blockize_kwargs
+        self._reorder_buffer = reorder_buffer
+        self._heap: list[tuple[float, int, HistoricalState]] = []
+        self._seq = itertools.count()
+
+        self._last_timestamp: float | None = None
+        self._block: int | None = None
+        self._states: list[HistoricalState] = []
+
+    def push(
+        self, state: HistoricalState
+    ) -> Iterator[tuple[int, list[HistoricalState]]]:
+        if self._reorder_buffer:
+            heapq.heappush(self._heap, (state.timestamp, next(self._seq), state))
+            if len(self._heap) <= self._reorder_buffer:
+                return
+
+            _, _, state = heapq.heappop(self._heap)
+
+        yield from self._release(state)
+
+    def flush(self) -> Iterator[tuple[int, list[HistoricalState]]]:
+        while self._heap:
+            _, _, state = heapq.heappop(self._heap)
+            yield from self._release(state)
+
+        if self._states:
+            yield self._block, self._states  # type: ignore[misc]
+            self._block, self._states = None, []
+
+    def _release(
+        self, state: HistoricalState
+    ) -> Iterator[tuple[int, list[HistoricalState]]]:
+        if self._last_timestamp is not None and state.timestamp < self._last_timestamp:
+            raise OutOfOrderStateError(
+                f"state at {state.timestamp} received after {self._last_timestamp}"
+            )
+
+        self._last_timestamp = state.timestamp
+
+        block = blockize(state, **self._blockize_kwargs)
+        if self._block is not None and block != self._block:
+            yield self._block, self._states
+            self._states = []
+
+        self._block = block
+        self._states.append(state)
+
+
+def fingerprint_blocks(
+    historical_states: HistoricalStates,
+    *,
+    since: int | None = None,
+    **blockize_kwargs,
+) -> dict[int, int]:
+    """Hash of timestamps and states of each block
+
+    Cheap way to find which blocks changed between two versions of the same
+    historical states. Attributes are not included. If `since` is set only
+    blocks from it on are hashed.
+    """
+
+    if since is not None:
+        historical_states = _states_from_block(historical_states, since)
+
+    if isinstance(historical_states, HistoricalTimeline):
+        historical_states = historical_states.view()
+
+    ret = {}
+    if isinstance(historical_states, HistoricalStateArray):
+        # Hash slices of the columns, no per-block views
+        order, groups = group_slices(historical_states.block_keys(**blockize_kwargs))
+        if order is not None:
+            historical_states = historical_states.take(order)
+
+        timestamps = memoryview(historical_states.timestamps)
+        states = memoryview(historical_states.states)
+        for block, block_slice in groups:
+            if since is None or block >= since:
+                ret[block] = hash(
+                    (bytes(timestamps[block_slice]), bytes(states[block_slice]))
+                )
+
+        return ret
+
+    for block, states in group_by_interval(historical_states, **blockize_kwargs):
+        if since is not None and block < since:
+            continue
+
+        ret[block] = hash(tuple((x.timestamp, x.state) for x in states))
+
+    return ret
+
+
+def _states_from_block(
+    historical_states: HistoricalStates, block: int
+) -> HistoricalStates:
+    # States that can belong to blocks >= block (and maybe a few from the
+    # previous one). Sorted arrays are cut with a binary search, lists filtered
+    cutoff = block - 1
+    if isinstance(historical_states, HistoricalTimeline):
+        return historical_states.after(cutoff)
+
+    if isinstance(historical_states, HistoricalStateArray):
+        if historical_states.is_sorted():
+            return historical_states.after(cutoff)
+
+        return historical_states
+
+    return [x for x in historical_states if x.timestamp > cutoff]
+
+
+def block_keys(
+    timestamps: Sequence[float],
+    *,
+    granularity: int = 60 * 60,
+    border_in_previous_block: bool = True,
+) -> Sequence[int]:
+    """Vectorized version of `blockize` over a sequence of timestamps"""
+
+    if (np := get_numpy()) is None:
+        return [
+            _blockize_ts(
+                ceil(ts),
+                granularity=granularity,
+                border_in_previous_block=border_in_previous_block,
+            )
+            for ts in timestamps
+        ]
+
+    ts = np.asarray(timestamps)
+    if ts.dtype.kind == "f":
+        ts = np.ceil(ts)
+    ts = ts.astype(np.int64, copy=False)
+
+    blocks = ts // granularity
+    if border_in_previous_block:
+        blocks -= ts % granularity == 0
+
+    return blocks * granularity
+
+
+def group_slices(
+    keys: Sequence[int],
+) -> tuple[Sequence[int] | None, list[tuple[int, slice]]]:
+    """Find groups of equal block keys with (at most) one stable sort
+
+    Returns the order to apply to the input, None if already sorted, and a list
+    of (block_start, slice) pairs over the reordered input.
+    """
+
+    n = len(keys)
+    if n == 0:
+        return None, []
+
+    order = None
+
+    if (np := get_numpy()) is not None:
+        keys = np.asarray(keys)
+        diff = np.diff(keys)
+        if (diff < 0).any():
+            order = np.argsort(keys, kind="stable")
+            keys = keys[order]
+            diff = np.diff(keys)
+
+        starts = [0, *(np.flatnonzero(diff) + 1).tolist()]
+        blocks = keys[starts].tolist()
+        ends = [*starts[1:], n]
+        return order, [(b, slice(s, e)) for b, s, e in zip(blocks, starts, ends)]
+
+    if not _is_monotonic(keys):
+        order = sorted(range(n), key=keys.__getitem__)
+        keys = [keys[idx] for idx in order]
+
+    groups = []
+    start = 0
+    for idx in range(1, n + 1):
+        if idx == n or keys[idx] != keys[start]:
+            groups.append((keys[start], slice(start, idx)))
+            start = idx
+
+    return order, groups
 
 
 def blockize(
@@ -47,7 +702,14 @@ def blockize(
     granularity: int = 60 * 60,
     border_in_previous_block: bool = True,
 ) -> int:
-    ts = ceil(historical_states.timestamp)
+    return _blockize_ts(
+        ceil(historical_states.timestamp),
+        granularity=granularity,
+        border_in_previous_block=border_in_previous_block,
+    )
+
+
+def _blockize_ts(ts: int, *, granularity: int, border_in_previous_block: bool) -> int:
     block = ts // granularity
     leftover = ts % granularity
     if border_in_previous_block and leftover == 0:
@@ -79,15 +741,128 @@ async def hass_get_last_statistic(
     if types is None:
         types = {"last_reset", "max", "mean", "min", "state", "sum"}
 
+    if (batcher := hass.data.get(DATA_LAST_STATISTIC_BATCHER)) is None:
+        batcher = hass.data[DATA_LAST_STATISTIC_BATCHER] = _LastStatisticBatcher(hass)
+
+    return await batcher.async_get(
+        statistics_metadata["statistic_id"], convert_units, frozenset(types)
+    )
+
+
+class _LastStatisticBatcher:
+    # Lookups requested within a short window are resolved together in a single
+    # recorder executor job and the results are fanned out to the callers.
+    # This avoids a storm of executor jobs when lots of sensors start at once.
+
+    def __init__(self, hass: HomeAssistant):
+        self._hass = hass
+        self._pending: dict[
+            tuple[bool, frozenset[str]], dict[str, list[asyncio.Future]]
+        ] = {}
+        self._timer: asyncio.TimerHandle | None = None
+
+    def async_get(
+        self, statistic_id: str, convert_units: bool, types: frozenset[str]
+    ) -> asyncio.Future:
+        fut = self._hass.loop.create_future()
+        waiters = self._pending.setdefault((convert_units, types), {})
+        waiters.setdefault(statistic_id, []).append(fut)
+
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(
+                LAST_STATISTIC_BATCH_WINDOW, self._async_flush
+            )
+
+        return fut
+
+    @callback
+    def _async_flush(self) -> None:
+        self._timer = None
+        pending, self._pending = self._pending, {}
+
+        for (convert_units, types), waiters in pending.items():
+            self._hass.async_create_background_task(
+                self._async_resolve(convert_units, types, waiters),
+                name="historical sensor last statistics lookup",
+            )
+
+    async def _async_resolve(
+        self,
+        convert_units: bool,
+        types: frozenset[str],
+        waiters: dict[str, list[asyncio.Future]],
+    ) -> None:
+        LOGGER.debug(f"resolving last statistic for {len(waiters)} statistic_ids")
+
+        from homeassistant.components import recorder
+
+        try:
+            res = await recorder.get_instance(self._hass).async_add_executor_job(
+                _get_last_statistics_many,
+                self._hass,
+                set(waiters),
+                convert_units,
+                set(types),
+            )
+        except Exception as e:
+            for futs in waiters.values():
+                for fut in futs:
+                    if not fut.done():
+                        fut.set_exception(e)
+            return
+
+        for statistic_id, futs in waiters.items():
+            for fut in futs:
+                if not fut.done():
+                    fut.set_result(res.get(statistic_id))
+
+
+def _get_last_statistics_many(
+    hass: HomeAssistant,
+    statistic_ids: set[str],
+    convert_units: bool,
+    types: set[Literal["last_reset", "max", "mean", "min", "state", "sum"]],
+) -> dict[str, StatisticsRow | None]:
+    from homeassistant.components.recorder.statistics import get_last_statistics
+
+    ret: dict[str, StatisticsRow | None] = {}
+    for statistic_id in statistic_ids:
+        res = get_last_statistics(hass, 1, statistic_id, convert_units, types)
+        ret[statistic_id] = res[statistic_id][0] if res else None
+
+    return ret
+
+
+async def hass_get_statistics_period(
+    hass: HomeAssistant,
+    statistics_metadata: StatisticMetaData,
+    start: float,
+    end: float,
+    *,
+    types: (
+        set[Literal["last_reset", "max", "mean", "min", "state", "sum"]] | None
+    ) = None,
+) -> list[StatisticsRow]:
+    """Hourly statistic rows with start in [start, end)"""
+
+    from homeassistant.components import recorder
+    from homeassistant.components.recorder.statistics import (
+        statistics_during_period,
+    )
+
+    if types is None:
+        types = {"last_reset", "max", "mean", "min", "state", "sum"}
+
+    statistic_id = statistics_metadata["statistic_id"]
     res = await recorder.get_instance(hass).async_add_executor_job(
-        get_last_statistics,
+        statistics_during_period,
         hass,
-        1,
-        statistics_metadata["statistic_id"],
-        convert_units,
+        dtutil.utc_from_timestamp(start),
+        dtutil.utc_from_timestamp(end),
+        {statistic_id},
+        "hour",
+        None,
         types,
     )
-    if not res:
-        return None
 
-    return res[statistics_metadata["statistic_id"]][0]
+    return res.get(statistic_id, [])
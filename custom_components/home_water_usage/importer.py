@@ -0,0 +1,92 @@
+"""Bulk import of water usage data from CSV or JSONL files."""
+
+import csv
+import json
+import logging
+import math
+import re
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+LOGGER = logging.getLogger(__name__)
+
+YEAR_MONTH_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+@dataclass
+class ImportResult:
+    # meter_id -> year_month -> usage
+    data: dict[str, dict[str, float]] = field(default_factory=dict)
+    rows: int = 0
+    rejected: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.elapsed:
+            return float(self.rows)
+
+        return self.rows / self.elapsed
+
+
+def parse_usage_file(path: str, default_meter_id: str) -> ImportResult:
+    """Parse a usage file line by line, runs in the executor.
+
+    CSV files need a header with `year_month` and `usage` (and optionally
+    `meter_id`) columns, JSONL files one object with the same keys per line.
+    Invalid rows are counted and skipped, the last row for a year_month wins.
+    Unreadable files raise OSError, UnicodeDecodeError or csv.Error.
+    """
+    t0 = time.monotonic()
+    result = ImportResult()
+
+    with open(path, encoding="utf-8", newline="") as fh:
+        if Path(path).suffix.lower() == ".csv":
+            records = csv.DictReader(fh)
+        else:
+            records = _iter_jsonl(fh)
+
+        for record in records:
+            result.rows += 1
+            if (row := _validate(record)) is None:
+                result.rejected += 1
+                continue
+
+            meter_id = str(record.get("meter_id") or default_meter_id)
+            year_month, usage = row
+            result.data.setdefault(meter_id, {})[year_month] = usage
+
+    result.elapsed = time.monotonic() - t0
+    return result
+
+
+def _iter_jsonl(fh) -> Iterator[dict | None]:
+    for line in fh:
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _validate(record: dict | None) -> tuple[str, float] | None:
+    if not isinstance(record, dict):
+        return None
+
+    year_month = str(record.get("year_month") or "").strip()
+    if not YEAR_MONTH_RE.match(year_month):
+        return None
+
+    try:
+        usage = float(record.get("usage"))
+    except (TypeError, ValueError):
+        return None
+
+    if not math.isfinite(usage) or usage < 0:
+        return None
+
+    return year_month, usage
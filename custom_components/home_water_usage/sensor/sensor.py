@@ -3,52 +3,95 @@ from datetime import datetime, timedelta
 from typing import Any
 
 from homeassistant.components.input_number import InputNumber
-from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
-from homeassistant.components.recorder.statistics import StatisticsRow
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfVolume
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import entity_platform
+from homeassistant.helpers.debounce import Debouncer
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.storage import Store
 from homeassistant.helpers.typing import DiscoveryInfoType
 from homeassistant.util import dt as dtutil
 
 from ..homeassistant_historical_sensor import (
+    CumulativeSumCalculator,
+    HistoricalMetricsSensor,
     HistoricalSensor,
     HistoricalState,
+    HistoricalTimeline,
+    PollPolicy,
     PollUpdateMixin,
 )
 
-from ..const import DOMAIN, NAME, PLATFORM
+from ..const import (
+    CONF_METERS,
+    CONF_UPDATE_INTERVAL,
+    DATA_METERS,
+    DEFAULT_METER_ID,
+    DEFAULT_UPDATE_INTERVAL,
+    DOMAIN,
+    NAME,
+    PLATFORM,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 STORAGE_KEY = f"{DOMAIN}_data"
 STORAGE_VERSION = 1
+# Bursts of service calls within this many seconds cause a single write
+STORAGE_SAVE_DELAY = 5
+# Edits of year-month and usage inputs within this many seconds are one write
+INPUT_DEBOUNCE_COOLDOWN = 1.0
 
 
 class WaterUsageSensor(PollUpdateMixin, HistoricalSensor, SensorEntity):
     """Water usage historical sensor."""
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry):
+    # Monthly values are stamped at month end midnight, keep them in that block
+    STATISTIC_CALCULATOR = CumulativeSumCalculator(border_in_previous_block=False)
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        meter_id: str = DEFAULT_METER_ID,
+    ):
         super().__init__()
 
         self.hass = hass
         self.config_entry = config_entry
+        self.meter_id = meter_id
+
+        # Default meter keeps ids (and stored data) from single meter versions
+        suffix = "" if meter_id == DEFAULT_METER_ID else f"_{meter_id}"
 
         self._attr_has_entity_name = True
-        self._attr_name = NAME
-        self._attr_unique_id = f"{PLATFORM}.{DOMAIN}"
-        self._attr_entity_id = f"{PLATFORM}.{DOMAIN}"
+        self._attr_name = NAME if not suffix else f"{NAME} {meter_id}"
+        self._attr_unique_id = f"{PLATFORM}.{DOMAIN}{suffix}"
+        self._attr_entity_id = f"{PLATFORM}.{DOMAIN}{suffix}"
         self._attr_device_class = SensorDeviceClass.WATER
         self._attr_native_unit_of_measurement = UnitOfVolume.CUBIC_METERS
 
-        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._store = Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}{suffix}")
+        self._save_pending = False
         self._data: dict[str, float] = {}  # year_month -> usage
 
-    async def async_added_to_hass(self) -> None:
-        await super().async_added_to_hass()
+        # Derived states are cached by month, only months added or edited since
+        # the last update (dirty) are parsed and merged into the timeline
+        self._month_states: dict[str, HistoricalState] = {}
+        self._dirty_months: set[str] = set()
+        self._timeline = HistoricalTimeline()
+
+    def get_poll_policy(self) -> PollPolicy:
+        minutes = self.config_entry.options.get(
+            CONF_UPDATE_INTERVAL, DEFAULT_UPDATE_INTERVAL
+        )
+        # Monthly data always lags behind, there are no gaps to catch up
+        return PollPolicy(interval=timedelta(minutes=minutes), catchup_lag=None)
+
+    async def async_load_persisted_data(self) -> None:
         await self._load_data()
 
     async def _load_data(self) -> None:
@@ -59,43 +102,101 @@ class WaterUsageSensor(PollUpdateMixin, HistoricalSensor, SensorEntity):
         else:
             self._data = {}
 
+        self._reset_historical_cache()
+
+    def _reset_historical_cache(self) -> None:
+        self._month_states = {}
+        self._dirty_months = set(self._data)
+        self._timeline = HistoricalTimeline()
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+
+        # Flush pending changes. On shutdown Store does the final write itself
+        if self._save_pending:
+            await self._save_data()
+
+        meters = self.hass.data[DOMAIN][DATA_METERS]
+        if meters.get(self.meter_id) is self:
+            del meters[self.meter_id]
+
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        self.historical_metrics.increment("store_writes")
+        return {"usage_data": self._data}
+
     async def _save_data(self) -> None:
         """Save water usage data."""
-        await self._store.async_save({"usage_data": self._data})
+        await self._store.async_save(self._data_to_save())
+
+    def _schedule_save(self) -> None:
+        """Save water usage data after a delay, coalescing further changes."""
+        if self._save_pending:
+            self.historical_metrics.increment("coalesced_saves")
+
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
 
     def add_water_usage(self, year_month: str, usage: float) -> None:
         """Add water usage for a specific year-month."""
         self._data[year_month] = usage
-        # Save data asynchronously
-        self.hass.async_create_task(self._save_data())
+        self._dirty_months.add(year_month)
+        self._schedule_save()
+
+    def merge_water_usage(self, data: dict[str, float]) -> None:
+        """Add or replace water usage for many year-months, not saved."""
+        self._data.update(data)
+        self._dirty_months.update(data)
+
+    def set_water_usage(self, data: dict[str, float]) -> None:
+        """Replace all water usage data."""
+        self._data = dict(data)
+        self._reset_historical_cache()
+
+    @staticmethod
+    def _month_state(year_month: str, usage: float) -> HistoricalState | None:
+        try:
+            # Parse year_month (format: "2024-01")
+            year, month = map(int, year_month.split('-'))
+
+            # Create timestamp for the end of the month
+            if month == 12:
+                end_of_month = datetime(year + 1, 1, 1) - timedelta(days=1)
+            else:
+                end_of_month = datetime(year, month + 1, 1) - timedelta(days=1)
+
+        except ValueError:
+            LOGGER.warning(f"Invalid year_month format: {year_month}")
+            return None
+
+        # Convert to timestamp
+        timestamp = dtutil.as_utc(end_of_month).timestamp()
+
+        return HistoricalState(state=usage, timestamp=timestamp)
 
     async def async_update_historical(self) -> None:
-        """Update historical states from stored data or generate sample data."""
-        historical_states = []
+        """Update historical states from stored data or generate sample data.
 
-        # First, add any manually entered data
-        for year_month, usage in self._data.items():
-            try:
-                # Parse year_month (format: "2024-01")
-                year, month = map(int, year_month.split('-'))
+        Only the states from the earliest changed month onwards are set as
+        historical states, older ones are already written.
+        """
+        historical_states = []
 
-                # Create timestamp for the end of the month
-                if month == 12:
-                    end_of_month = datetime(year + 1, 1, 1) - timedelta(days=1)
-                else:
-                    end_of_month = datetime(year, month + 1, 1) - timedelta(days=1)
+        # First, add any manually entered data changed since last update
+        dirty, self._dirty_months = self._dirty_months, set()
+        for year_month in dirty:
+            if year_month not in self._data:
+                continue
 
-                # Convert to timestamp
-                timestamp = dtutil.as_utc(end_of_month).timestamp()
+            state = self._month_state(year_month, self._data[year_month])
+            if state is None or state == self._month_states.get(year_month):
+                continue
 
-                historical_states.append(
-                    HistoricalState(state=usage, timestamp=timestamp)
-                )
-            except ValueError:
-                LOGGER.warning(f"Invalid year_month format: {year_month}")
+            self._month_states[year_month] = state
+            historical_states.append(state)
 
         # If no manual data, generate sample data for the last 12 months
-        if not historical_states:
+        if not historical_states and not self._timeline:
             import random
             current_date = datetime.now()
 
@@ -125,35 +226,13 @@ class WaterUsageSensor(PollUpdateMixin, HistoricalSensor, SensorEntity):
             # Save sample data
             await self._save_data()
 
-        self._attr_historical_states = sorted(historical_states, key=lambda x: x.timestamp)
+        pos = self._timeline.insert(historical_states)
+        if pos is not None:
+            self._attr_historical_states = self._timeline.copy(pos)
 
-    def get_statistic_metadata(self) -> StatisticMetaData:
-        """Return statistic metadata."""
-        meta = super().get_statistic_metadata()
-        meta["has_sum"] = True
-        return meta
-
-    async def async_calculate_statistic_data(
-        self, hist_states: list[HistoricalState], *, latest: StatisticsRow | None = None
-    ) -> list[StatisticData]:
-        """Calculate statistic data from historical states."""
-        accumulated = latest["sum"] if latest else 0
-
-        ret = []
-        for state in hist_states:
-            accumulated += state.state
-
-            dt = datetime.fromtimestamp(state.timestamp, tz=dtutil.UTC)
-
-            ret.append(
-                StatisticData(
-                    start=dt,
-                    state=state.state,
-                    sum=accumulated,
-                )
-            )
-
-        return ret
+    async def async_update_historical_full(self) -> None:
+        await self.async_update_historical()
+        self._attr_historical_states = self._timeline.copy()
 
 
 class WaterUsageInput(InputNumber):
@@ -179,7 +258,7 @@ class WaterUsageInput(InputNumber):
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
         # Get sensor instance
-        self._sensor = self.hass.data[DOMAIN][self.config_entry.entry_id].get("sensor")
+        self._sensor = self.hass.data[DOMAIN][DATA_METERS].get(DEFAULT_METER_ID)
 
 
 class YearMonthInput(InputNumber):
@@ -202,38 +281,73 @@ class YearMonthInput(InputNumber):
         self.config_entry = config_entry
         self._sensor = None
         self._usage_input = None
+        self._remove_input_tracker = None
+        self._debouncer = Debouncer(
+            hass,
+            LOGGER,
+            cooldown=INPUT_DEBOUNCE_COOLDOWN,
+            immediate=False,
+            function=self._async_commit_input,
+        )
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
         # Get sensor instance
-        self._sensor = self.hass.data[DOMAIN][self.config_entry.entry_id].get("sensor")
-
-        # Listen for state changes to trigger data saving
-        async def _state_changed_listener(event):
-            if self._sensor and self._usage_input:
-                try:
-                    year_month_int = int(self.state)
-                    year = year_month_int // 100
-                    month = year_month_int % 100
-
-                    if 1 <= month <= 12:
-                        year_month_str = f"{year:04d}-{month:02d}"
-                        usage = float(self._usage_input.state)
-
-                        self._sensor.add_water_usage(year_month_str, usage)
-                        # Trigger historical update
-                        await self._sensor.async_update_historical()
-                        await self._sensor.async_write_historical()
-                except (ValueError, AttributeError):
-                    pass
-
-        self.async_on_remove(
-            self.hass.bus.async_listen("state_changed", _state_changed_listener)
+        self._sensor = self.hass.data[DOMAIN][DATA_METERS].get(DEFAULT_METER_ID)
+
+        self._async_track_inputs()
+        self.async_on_remove(self._async_untrack_inputs)
+        self.async_on_remove(self._debouncer.async_shutdown)
+
+    @callback
+    def _async_track_inputs(self) -> None:
+        """Listen for state changes of this and the usage input only."""
+        self._async_untrack_inputs()
+
+        entity_ids = [self.entity_id]
+        if self._usage_input:
+            entity_ids.append(self._usage_input.entity_id)
+
+        self._remove_input_tracker = async_track_state_change_event(
+            self.hass, entity_ids, self._async_input_changed
         )
 
+    @callback
+    def _async_untrack_inputs(self) -> None:
+        if self._remove_input_tracker:
+            self._remove_input_tracker()
+            self._remove_input_tracker = None
+
+    @callback
+    def _async_input_changed(self, event: Event) -> None:
+        # Editing year-month and then usage ends up as a single write
+        self._debouncer.async_schedule_call()
+
+    async def _async_commit_input(self) -> None:
+        """Save the input values and trigger data saving."""
+        if not self._sensor or not self._usage_input:
+            return
+
+        try:
+            year_month_int = int(self.state)
+            year = year_month_int // 100
+            month = year_month_int % 100
+
+            if 1 <= month <= 12:
+                year_month_str = f"{year:04d}-{month:02d}"
+                usage = float(self._usage_input.state)
+
+                self._sensor.add_water_usage(year_month_str, usage)
+                # Trigger historical update
+                await self._sensor.async_request_historical_update()
+        except (ValueError, AttributeError):
+            pass
+
     def set_usage_input(self, usage_input):
         """Set reference to usage input entity."""
         self._usage_input = usage_input
+        if self.hass and self._remove_input_tracker:
+            self._async_track_inputs()
 
 
 async def async_setup_entry(
@@ -242,13 +356,30 @@ async def async_setup_entry(
     async_add_devices: AddEntitiesCallback,
     discovery_info: DiscoveryInfoType | None = None,
 ):
-    """Set up the sensor platform."""
-    sensor = WaterUsageSensor(hass, config_entry)
-
-    async_add_devices([sensor])
-
-    # Store sensor instance
-    hass.data[DOMAIN][config_entry.entry_id]["sensor"] = sensor
+    """Set up the sensor platform, one sensor per meter."""
+    meters = hass.data[DOMAIN][DATA_METERS]
+
+    entities = []
+    for meter_id in config_entry.options.get(CONF_METERS, [DEFAULT_METER_ID]):
+        if meter_id in meters:
+            LOGGER.error(f"Meter {meter_id} is already configured, ignoring it")
+            continue
+
+        # Index sensors by meter, services look them up from here
+        sensor = meters[meter_id] = WaterUsageSensor(hass, config_entry, meter_id)
+        entities.extend([sensor, HistoricalMetricsSensor(sensor)])
+
+    async_add_devices(entities)
+
+    # Clear and regenerate statistics from the whole history, in background.
+    # Only water sensors have statistics, not their metrics sensors
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        "rebuild_statistics",
+        {},
+        "async_rebuild_statistics",
+        entity_device_classes=[SensorDeviceClass.WATER],
+    )
 
     # Create input_number entities via service calls
     await _create_input_entities(hass, config_entry)
@@ -0,0 +1,186 @@
+# Copyright (C) 2021-2023 Luis López <luis@cuarentaydos.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
+# USA.
+
+
+from __future__ import annotations
+
+import time
+from collections.abc import Sequence
+from itertools import accumulate
+from typing import TYPE_CHECKING
+
+from homeassistant.util import dt as dtutil
+
+from . import timemachine as tm
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import StatisticData
+    from homeassistant.components.recorder.statistics import StatisticsRow
+
+
+class StatisticCalculator:
+    """Base class for statistic calculators
+
+    Calculators turn historical states into one statistic row per block (see
+    `timemachine.blockize`). States are processed as columns, datetime objects
+    are only created once per block.
+    """
+
+    has_sum: bool = False
+    has_mean: bool = False
+
+    def __init__(
+        self, *, granularity: int = 60 * 60, border_in_previous_block: bool = True
+    ):
+        # Recorder statistics are hourly, a block must span whole rows
+        if granularity <= 0 or granularity % (60 * 60):
+            raise ValueError(
+                f"granularity must be a multiple of one hour, got {granularity}"
+            )
+
+        self.granularity = granularity
+        self.border_in_previous_block = border_in_previous_block
+
+    def calculate(
+        self,
+        hist_states: tm.HistoricalStates,
+        *,
+        latest: StatisticsRow | None = None,
+    ) -> list[StatisticData]:
+        states = tm.as_state_array(hist_states)
+        if not states:
+            return []
+
+        order, groups = tm.group_slices(
+            states.block_keys(
+                granularity=self.granularity,
+                border_in_previous_block=self.border_in_previous_block,
+            )
+        )
+        if order is not None:
+            states = states.take(order)
+
+        blocks = [block for block, _ in groups]
+        starts = [block_slice.start for _, block_slice in groups]
+        ends = [block_slice.stop for _, block_slice in groups]
+
+        return self.calculate_blocks(blocks, starts, ends, states.states, latest=latest)
+
+    def calculate_blocks(
+        self,
+        blocks: list[int],
+        starts: list[int],
+        ends: list[int],
+        values: Sequence[float],
+        *,
+        latest: StatisticsRow | None = None,
+    ) -> list[StatisticData]:
+        raise NotImplementedError()
+
+
+class CumulativeSumCalculator(StatisticCalculator):
+    """Each block gets the total of its states as `state` and the running total,
+    continuing from `latest["sum"]`, as `sum`
+    """
+
+    has_sum = True
+
+    def calculate_blocks(self, blocks, starts, ends, values, *, latest=None):
+        from homeassistant.components.recorder.models import StatisticData
+
+        base = (latest or {}).get("sum") or 0
+
+        if (np := tm.get_numpy()) is not None:
+            prefix = np.cumsum(np.asarray(values, dtype=np.float64)).tolist()
+        else:
+            prefix = list(accumulate(values))
+
+        ret = []
+        prev = 0.0
+        for block, end in zip(blocks, ends):
+            total = prefix[end - 1]
+            ret.append(
+                StatisticData(
+                    start=dtutil.utc_from_timestamp(block),
+                    state=total - prev,
+                    sum=base + total,
+                )
+            )
+            prev = total
+
+        return ret
+
+
+class MeanMinMaxCalculator(StatisticCalculator):
+    """Each block gets the mean, min and max of its states"""
+
+    has_mean = True
+
+    def calculate_blocks(self, blocks, starts, ends, values, *, latest=None):
+        from homeassistant.components.recorder.models import StatisticData
+
+        if (np := tm.get_numpy()) is not None:
+            arr = np.asarray(values, dtype=np.float64)
+            idx = np.asarray(starts)
+            counts = np.asarray(ends) - idx
+            means = (np.add.reduceat(arr, idx) / counts).tolist()
+            mins = np.minimum.reduceat(arr, idx).tolist()
+            maxs = np.maximum.reduceat(arr, idx).tolist()
+
+        else:
+            means, mins, maxs = [], [], []
+            for start, end in zip(starts, ends):
+                block_values = values[start:end]
+                means.append(sum(block_values) / (end - start))
+                mins.append(min(block_values))
+                maxs.append(max(block_values))
+
+        return [
+            StatisticData(
+                start=dtutil.utc_from_timestamp(block),
+                mean=mean,
+                min=min_,
+                max=max_,
+            )
+            for block, mean, min_, max_ in zip(blocks, means, mins, maxs)
+        ]
+
+
+def run_calculation(
+    calculator: StatisticCalculator,
+    hist_states: tm.HistoricalStates,
+    after_block: int | None = None,
+    latest: StatisticsRow | None = None,
+) -> tuple[list[StatisticData], float]:
+    """Sort, drop states in blocks up to after_block and calculate
+
+    Meant to run in a thread or process pool (arguments are picklable if
+    hist_states is a HistoricalStateArray). Returns statistics and the time
+    spent, that is, event loop time saved.
+    """
+    t0 = time.monotonic()
+
+    hist_states = tm.sort_states(hist_states)
+    if after_block is not None:
+        hist_states = tm.states_after_block(
+            hist_states,
+            after_block,
+            granularity=calculator.granularity,
+            border_in_previous_block=calculator.border_in_previous_block,
+        )
+
+    return calculator.calculate(hist_states, latest=latest), time.monotonic() - t0
@@ -20,3 +20,27 @@ MIN_REQ_MAJOR_VERSION = 2025
 MIN_REQ_MINOR_VERSION = 12
 
 HOMEASSISTANT_INTERNAL_UPDATE_SECONDS = 30
+
+DATA_WATERMARK_STORE = "homeassistant_historical_sensor_watermarks"
+WATERMARK_STORAGE_KEY = "homeassistant_historical_sensor.watermarks"
+WATERMARK_STORAGE_VERSION = 1
+WATERMARK_SAVE_DELAY = 10
+
+DATA_REBUILD_CHECKPOINT_STORE = "homeassistant_historical_sensor_rebuild_checkpoints"
+REBUILD_CHECKPOINT_STORAGE_KEY = "homeassistant_historical_sensor.rebuild_checkpoints"
+
+DATA_LAST_STATISTIC_BATCHER = "homeassistant_historical_sensor_last_statistic_batcher"
+LAST_STATISTIC_BATCH_WINDOW = 0.05
+
+DATA_UPDATE_SEMAPHORE = "homeassistant_historical_sensor_update_semaphore"
+MAX_CONCURRENT_UPDATES = 4
+
+DATA_PROCESS_POOL = "homeassistant_historical_sensor_process_pool"
+PROCESS_POOL_WORKERS = 2
+
+CORRECTION_LOOKBACK = 24 * 60 * 60
+CORRECTION_MAX_LOOKBACK = 366 * 24 * 60 * 60
+
+DATA_JOURNALS = "homeassistant_historical_sensor_journals"
+JOURNAL_STORAGE_DIR = "homeassistant_historical_sensor"
+JOURNAL_COMPACT_THRESHOLD = 1 << 20  # bytes, 65536 records
@@ -0,0 +1,274 @@
+# Copyright (C) 2021-2023 Luis López <luis@cuarentaydos.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
+# USA.
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_right
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from math import ceil
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+
+from . import timemachine as tm
+from .consts import DATA_JOURNALS, JOURNAL_COMPACT_THRESHOLD, JOURNAL_STORAGE_DIR
+
+LOGGER = logging.getLogger(__name__)
+
+
+# On disk layout, one directory per journal:
+#
+# * journal.bin: (timestamp, value) records in arrival order. Appends only, it
+#   can have duplicated timestamps (last one wins) and be unsorted.
+# * <year>.seg: sorted records with unique timestamps for that (UTC) year.
+#
+# Compaction folds journal.bin into the segments and truncates it. Segments are
+# replaced atomically before the journal is truncated, replaying a journal
+# again over compacted segments is harmless.
+
+RECORD = struct.Struct("<qd")
+JOURNAL_FILENAME = "journal.bin"
+SEGMENT_SUFFIX = ".seg"
+
+
+class HistoricalJournal:
+    """Append-only segmented storage of (timestamp, value) historical states
+
+    Methods are blocking, use the async_* variants from the event loop.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._lock = asyncio.Lock()
+
+    @property
+    def journal_path(self) -> Path:
+        return self.path / JOURNAL_FILENAME
+
+    def journal_size(self) -> int:
+        try:
+            return self.journal_path.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def append(self, states: Iterable[tm.HistoricalState]) -> int:
+        buff = bytearray()
+        for state in states:
+            buff += RECORD.pack(ceil(state.timestamp), float(state.state))
+
+        if not buff:
+            return 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, "ab") as fh:
+            # Drop a truncated trailing record (interrupted append), new records
+            # would be misaligned otherwise
+            if torn := fh.tell() % RECORD.size:
+                LOGGER.warning(
+                    f"{self.journal_path}: dropping {torn} bytes of a truncated record"
+                )
+                fh.truncate(fh.tell() - torn)
+
+            fh.write(buff)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        return len(buff) // RECORD.size
+
+    def read_since(self, since: float | None = None) -> tm.HistoricalStateArray:
+        """States with timestamp > since (all if None), sorted and unique"""
+
+        first_year = _year(since) if since is not None else None
+        timestamps, values = array("q"), array("d")
+
+        for year, segment in self._segments():
+            if first_year is not None and year < first_year:
+                continue
+
+            seg_ts, seg_values = _read_records(segment, since, is_sorted=True)
+            timestamps.extend(seg_ts)
+            values.extend(seg_values)
+
+        # Journal records, unsorted, override segments
+        pending = dict(zip(*_read_records(self.journal_path, since, is_sorted=False)))
+        if pending:
+            merged = list(
+                tm._merge_sorted_unique(
+                    zip(timestamps, values), sorted(pending.items())
+                )
+            )
+            timestamps = array("q", [x[0] for x in merged])
+            values = array("d", [x[1] for x in merged])
+
+        return tm.HistoricalStateArray(timestamps, values)
+
+    def compact(self) -> int:
+        """Fold the journal into sorted segments, returns records folded"""
+
+        journal_ts, journal_values = _read_records(
+            self.journal_path, None, is_sorted=False
+        )
+        if not journal_ts:
+            return 0
+
+        by_year: dict[int, dict[int, float]] = {}
+        for ts, value in zip(journal_ts, journal_values):
+            by_year.setdefault(_year(ts), {})[ts] = value
+
+        for year, pending in sorted(by_year.items()):
+            segment = self.path / f"{year}{SEGMENT_SUFFIX}"
+            merged = tm._merge_sorted_unique(
+                zip(*_read_records(segment, None, is_sorted=True)),
+                sorted(pending.items()),
+            )
+
+            tmp = segment.with_suffix(".tmp")
+            with open(tmp, "wb") as fh:
+                fh.write(b"".join(RECORD.pack(ts, value) for ts, value in merged))
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp, segment)
+
+        with open(self.journal_path, "r+b") as fh:
+            fh.truncate(0)
+
+        LOGGER.debug(
+            f"{self.path}: compacted {len(journal_ts)} records "
+            + f"into {len(by_year)} segments"
+        )
+        return len(journal_ts)
+
+    async def async_append(
+        self, hass: HomeAssistant, states: Iterable[tm.HistoricalState]
+    ) -> int:
+        """Append states, compacting if the journal grew too big"""
+        states = list(states)
+        async with self._lock:
+            return await hass.async_add_executor_job(self._append_and_compact, states)
+
+    async def async_read_since(
+        self, hass: HomeAssistant, since: float | None = None
+    ) -> tm.HistoricalStateArray:
+        async with self._lock:
+            return await hass.async_add_executor_job(self.read_since, since)
+
+    async def async_compact(self, hass: HomeAssistant) -> int:
+        async with self._lock:
+            return await hass.async_add_executor_job(self.compact)
+
+    def _append_and_compact(self, states: list[tm.HistoricalState]) -> int:
+        # Blocking part of async_append, the size check stats the journal
+        n = self.append(states)
+        if self.journal_size() >= JOURNAL_COMPACT_THRESHOLD:
+            self.compact()
+
+        return n
+
+    def _segments(self) -> list[tuple[int, Path]]:
+        if not self.path.is_dir():
+            return []
+
+        ret = []
+        for segment in self.path.glob(f"*{SEGMENT_SUFFIX}"):
+            try:
+                ret.append((int(segment.stem), segment))
+            except ValueError:
+                LOGGER.warning(f"{segment}: ignoring unknown segment")
+
+        return sorted(ret)
+
+
+def async_get_journal(hass: HomeAssistant, key: str) -> HistoricalJournal:
+    """Shared journal for key (ex. statistic_id) under HA's storage dir"""
+    journals = hass.data.setdefault(DATA_JOURNALS, {})
+    if (journal := journals.get(key)) is None:
+        journal = journals[key] = HistoricalJournal(
+            hass.config.path(".storage", JOURNAL_STORAGE_DIR, key)
+        )
+
+    return journal
+
+
+class _RecordTimestamps:
+    # Timestamps of a records buffer as a sequence, for bisect
+    def __init__(self, buff):
+        self._buff = buff
+
+    def __len__(self) -> int:
+        return len(self._buff) // RECORD.size
+
+    def __getitem__(self, idx: int) -> int:
+        return RECORD.unpack_from(self._buff, idx * RECORD.size)[0]
+
+
+def _read_records(
+    path: Path, since: float | None, *, is_sorted: bool
+) -> tuple[array, array]:
+    # Records with timestamp > since from a memory mapped file. A truncated
+    # trailing record (interrupted append) is ignored
+    timestamps, values = array("q"), array("d")
+
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        return timestamps, values
+
+    with fh:
+        size = os.fstat(fh.fileno()).st_size
+        size -= size % RECORD.size
+        if not size:
+            return timestamps, values
+
+        with (
+            mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm,
+            memoryview(mm)[:size] as buff,
+        ):
+            start = 0
+            if since is not None and is_sorted:
+                start = bisect_right(_RecordTimestamps(buff), since)
+
+            with buff[start * RECORD.size :] as tail:
+                if (np := tm.get_numpy()) is not None:
+                    records = np.frombuffer(
+                        tail, dtype=np.dtype([("ts", "<i8"), ("value", "<f8")])
+                    )
+                    if since is not None and not is_sorted:
+                        records = records[records["ts"] > since]
+                    timestamps = array("q", records["ts"].tobytes())
+                    values = array("d", records["value"].tobytes())
+                    # Release the buffer before unmapping
+                    del records
+
+                else:
+                    for ts, value in RECORD.iter_unpack(tail):
+                        if since is None or ts > since:
+                            timestamps.append(ts)
+                            values.append(value)
+
+    return timestamps, values
+
+
+def _year(ts: float) -> int:
+    return datetime.fromtimestamp(ts, UTC).year
@@ -0,0 +1,141 @@
+# Copyright (C) 2021-2023 Luis López <luis@cuarentaydos.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
+# USA.
+
+
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+ROLLING_WINDOW = 100
+
+
+@dataclass
+class PhaseMetrics:
+    """Timing of a phase of the historical pipeline
+
+    `executor` marks phases that run outside the event loop (recorder or
+    executor jobs), its time doesn't block the loop. `io` marks phases waiting
+    on I/O (ex. fetching from the provider) and `nested` phases wrapping other
+    phases (ex. a whole update), both are left out of loop and executor time so
+    nothing is counted twice.
+    """
+
+    executor: bool = False
+    io: bool = False
+    nested: bool = False
+    count: int = 0
+    total: float = 0.0
+    samples: deque[float] = field(default_factory=lambda: deque(maxlen=ROLLING_WINDOW))
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        if not self.samples:
+            return None
+
+        values = sorted(self.samples)
+        idx = min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))
+        return values[idx]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "executor": self.executor,
+            "io": self.io,
+            "nested": self.nested,
+            "count": self.count,
+            "total": self.total,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class SensorMetrics:
+    """Per sensor timings and counters"""
+
+    def __init__(self):
+        self.phases: dict[str, PhaseMetrics] = {}
+        self.counters: dict[str, int] = {}
+
+    @contextmanager
+    def time(
+        self,
+        phase: str,
+        *,
+        executor: bool = False,
+        io: bool = False,
+        nested: bool = False,
+    ) -> Iterator[None]:
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(
+                phase,
+                time.monotonic() - t0,
+                executor=executor,
+                io=io,
+                nested=nested,
+            )
+
+    def record(
+        self,
+        phase: str,
+        seconds: float,
+        *,
+        executor: bool = False,
+        io: bool = False,
+        nested: bool = False,
+    ) -> None:
+        if (metrics := self.phases.get(phase)) is None:
+            metrics = self.phases[phase] = PhaseMetrics(
+                executor=executor, io=io, nested=nested
+            )
+
+        metrics.record(seconds)
+
+    def increment(self, counter: str, n: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def _leaf_phases(self) -> Iterator[PhaseMetrics]:
+        return (x for x in self.phases.values() if not x.nested)
+
+    @property
+    def loop_time(self) -> float:
+        return sum(x.total for x in self._leaf_phases() if not x.executor and not x.io)
+
+    @property
+    def executor_time(self) -> float:
+        return sum(x.total for x in self._leaf_phases() if x.executor)
+
+    @property
+    def io_time(self) -> float:
+        return sum(x.total for x in self._leaf_phases() if x.io)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phases": {k: v.as_dict() for k, v in self.phases.items()},
+            "counters": dict(self.counters),
+            "loop_time": self.loop_time,
+            "executor_time": self.executor_time,
+            "io_time": self.io_time,
+        }
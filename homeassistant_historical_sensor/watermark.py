@@ -0,0 +1,181 @@
+# Copyright (C) 2021-2023 Luis López <luis@cuarentaydos.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
+# USA.
+
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant
+
+from .consts import (
+    DATA_REBUILD_CHECKPOINT_STORE,
+    DATA_WATERMARK_STORE,
+    REBUILD_CHECKPOINT_STORAGE_KEY,
+    WATERMARK_SAVE_DELAY,
+    WATERMARK_STORAGE_KEY,
+    WATERMARK_STORAGE_VERSION,
+)
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+    from homeassistant.components.recorder.statistics import StatisticsRow
+
+LOGGER = logging.getLogger(__name__)
+
+
+# A watermark is the last statistic row we know is in the database for a given
+# statistic_id. It is kept in memory (and persisted) so each update doesn't need
+# to read back from the recorder what we wrote ourselves.
+#
+# The recorder is queried again only if:
+# * There is no watermark for the statistic (cold start)
+# * The statistic metadata changed since the watermark was recorded
+# * The watermark was explicitly invalidated
+
+
+@dataclass
+class StatisticWatermark:
+    metadata_key: str
+    start: float | None = None
+    sum: float | None = None
+    state: float | None = None
+
+    @classmethod
+    def from_statistics_row(
+        cls, metadata_key: str, row: StatisticsRow | None
+    ) -> StatisticWatermark:
+        if row is None:
+            return cls(metadata_key=metadata_key)
+
+        return cls(
+            metadata_key=metadata_key,
+            start=row["start"],
+            sum=row.get("sum"),
+            state=row.get("state"),
+        )
+
+    @classmethod
+    def from_statistic_data(
+        cls, metadata_key: str, statistics_data: list[StatisticData]
+    ) -> StatisticWatermark | None:
+        if not statistics_data:
+            return None
+
+        last = max(statistics_data, key=lambda x: x["start"])
+        return cls(
+            metadata_key=metadata_key,
+            start=last["start"].timestamp(),
+            sum=last.get("sum"),
+            state=last.get("state"),
+        )
+
+    def as_statistics_row(self) -> StatisticsRow | None:
+        if self.start is None:
+            return None
+
+        from homeassistant.components.recorder.statistics import StatisticsRow
+
+        row = StatisticsRow(start=self.start, end=self.start + 60 * 60)
+        if self.sum is not None:
+            row["sum"] = self.sum
+        if self.state is not None:
+            row["state"] = self.state
+
+        return row
+
+
+def metadata_fingerprint(statistics_metadata: StatisticMetaData) -> str:
+    buff = json.dumps(statistics_metadata, sort_keys=True, default=str)
+    return hashlib.sha1(buff.encode("utf-8")).hexdigest()
+
+
+class WatermarkStore:
+    """Shared store of statistic watermarks, indexed by statistic_id"""
+
+    def __init__(self, hass: HomeAssistant, key: str = WATERMARK_STORAGE_KEY):
+        from homeassistant.helpers.storage import Store
+
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, WATERMARK_STORAGE_VERSION, key
+        )
+        self._watermarks: dict[str, StatisticWatermark] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def async_load(self) -> None:
+        async with self._load_lock:
+            if self._loaded:
+                return
+
+            data = await self._store.async_load() or {}
+            for statistic_id, value in data.items():
+                try:
+                    self._watermarks[statistic_id] = StatisticWatermark(**value)
+                except TypeError:
+                    LOGGER.warning(
+                        f"{statistic_id}: ignoring invalid watermark {value}"
+                    )
+
+            self._loaded = True
+
+    def get(self, statistic_id: str) -> StatisticWatermark | None:
+        return self._watermarks.get(statistic_id)
+
+    def async_set(self, statistic_id: str, watermark: StatisticWatermark) -> None:
+        self._watermarks[statistic_id] = watermark
+        self._store.async_delay_save(self._data_to_save, WATERMARK_SAVE_DELAY)
+
+    def async_invalidate(self, statistic_id: str) -> None:
+        if self._watermarks.pop(statistic_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, WATERMARK_SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Write to disk now instead of waiting for the delayed save"""
+        await self._store.async_save(self._data_to_save())
+
+    def _data_to_save(self) -> dict[str, dict[str, Any]]:
+        return {k: asdict(v) for k, v in self._watermarks.items()}
+
+
+async def async_get_watermark_store(hass: HomeAssistant) -> WatermarkStore:
+    if (store := hass.data.get(DATA_WATERMARK_STORE)) is None:
+        store = hass.data[DATA_WATERMARK_STORE] = WatermarkStore(hass)
+
+    await store.async_load()
+    return store
+
+
+async def async_get_rebuild_checkpoint_store(hass: HomeAssistant) -> WatermarkStore:
+    # Rebuild checkpoints are watermarks too: the last row already imported by
+    # an unfinished rebuild. start=None means statistics were cleared but
+    # nothing was imported yet.
+    if (store := hass.data.get(DATA_REBUILD_CHECKPOINT_STORE)) is None:
+        store = hass.data[DATA_REBUILD_CHECKPOINT_STORE] = WatermarkStore(
+            hass, REBUILD_CHECKPOINT_STORAGE_KEY
+        )
+
+    await store.async_load()
+    return store
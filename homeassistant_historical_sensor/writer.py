@@ -0,0 +1,153 @@
+# Copyright (C) 2021-2023 Luis López <luis@cuarentaydos.com>
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301,
+# USA.
+
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dtutil
+
+if TYPE_CHECKING:
+    from homeassistant.components.recorder.models import (
+        StatisticData,
+        StatisticMetaData,
+    )
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 5_000
+
+
+@dataclass
+class ChunkReport:
+    rows: int
+    commit_latency: float
+    backlog: int
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.commit_latency:
+            return float(self.rows)
+
+        return self.rows / self.commit_latency
+
+
+async def async_import_statistics_chunked(
+    hass: HomeAssistant,
+    statistics_metadata: StatisticMetaData,
+    statistics_data: list[StatisticData],
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[ChunkReport]:
+    """Import statistics in chunks, waiting for the recorder between them
+
+    async_import_statistics only queues an import task into the recorder. Here
+    each chunk is followed by a barrier processed by the recorder thread after
+    the import task, so a big import doesn't flood the queue, commit_latency
+    covers the actual write and, once this coroutine returns, all data has been
+    committed into the database.
+    """
+
+    from homeassistant.components import recorder
+    from homeassistant.components.recorder.statistics import async_import_statistics
+
+    if chunk_size <= 0:
+        raise ValueError(f"invalid chunk_size: {chunk_size}")
+
+    instance = recorder.get_instance(hass)
+    statistic_id = statistics_metadata["statistic_id"]
+
+    reports = []
+    for offset in range(0, len(statistics_data), chunk_size):
+        chunk = statistics_data[offset : offset + chunk_size]
+
+        t0 = time.monotonic()
+        async_import_statistics(hass, statistics_metadata, chunk)
+        backlog = instance.backlog
+        await _async_recorder_barrier(instance)
+
+        report = ChunkReport(
+            rows=len(chunk), commit_latency=time.monotonic() - t0, backlog=backlog
+        )
+        reports.append(report)
+
+        LOGGER.debug(
+            f"{statistic_id}: imported {report.rows} rows "
+            + f"in {report.commit_latency:.3f}s "
+            + f"({report.rows_per_second:.0f} rows/s, backlog={report.backlog})"
+        )
+
+    return reports
+
+
+async def async_adjust_statistics_sum(
+    hass: HomeAssistant,
+    statistics_metadata: StatisticMetaData,
+    start: float,
+    delta: float,
+) -> None:
+    """Shift `sum` of every statistic row starting at or after `start` by delta
+
+    The recorder does it with a single UPDATE, no rows are read back.
+    """
+
+    from homeassistant.components import recorder
+
+    instance = recorder.get_instance(hass)
+    instance.async_adjust_statistics(
+        statistics_metadata["statistic_id"],
+        dtutil.utc_from_timestamp(start),
+        delta,
+        statistics_metadata["unit_of_measurement"],
+    )
+    await _async_recorder_barrier(instance)
+
+    LOGGER.debug(
+        f"{statistics_metadata['statistic_id']}: shifted sum by {delta} "
+        + f"since {dtutil.utc_from_timestamp(start)}"
+    )
+
+
+async def async_clear_statistics(
+    hass: HomeAssistant, statistics_metadata: StatisticMetaData
+) -> None:
+    """Remove all statistic rows (and metadata) of the statistic"""
+
+    from homeassistant.components import recorder
+
+    instance = recorder.get_instance(hass)
+    instance.async_clear_statistics([statistics_metadata["statistic_id"]])
+    await _async_recorder_barrier(instance)
+
+
+async def _async_recorder_barrier(instance) -> None:
+    # Wait for the recorder thread to process every task queued so far.
+    # Recorder.async_block_till_done returns early if the queue is empty, which
+    # is also the case while the last task (ex. our import) is still running.
+    # Tasks run in order and each one commits its own session, a
+    # SynchronizeTask queued behind them is only processed once they are done.
+    from homeassistant.components.recorder.tasks import SynchronizeTask
+
+    future: asyncio.Future[None] = instance.hass.loop.create_future()
+    instance.queue_task(SynchronizeTask(future))
+    await future
@@ -0,0 +1,11 @@
+import pytest
+
+from benchmarks import importtime
+
+
+@pytest.mark.parametrize("module", list(importtime.BUDGETS_MS))
+def test_import_time_within_budget(module):
+    total, slowest = importtime.measure(module)
+
+    budget = importtime.BUDGETS_MS[module]
+    assert total <= budget, f"{module} took {total:.1f} ms: {slowest}"
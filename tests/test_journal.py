@@ -0,0 +1,79 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from homeassistant_historical_sensor import journal as journal_mod
+from homeassistant_historical_sensor import timemachine as tm
+from homeassistant_historical_sensor.journal import RECORD, HistoricalJournal
+
+YEAR = 365 * 24 * 3600
+TIMEOUT = 10
+
+
+def _states(*timestamps: int) -> list[tm.HistoricalState]:
+    return [tm.HistoricalState(state=float(ts), timestamp=ts) for ts in timestamps]
+
+
+def test_append_read_compact(tmp_path):
+    journal = HistoricalJournal(tmp_path)
+
+    journal.append(_states(2 * YEAR, YEAR, 2 * YEAR + 10))
+    journal.append(_states(YEAR))
+
+    expected = [YEAR, 2 * YEAR, 2 * YEAR + 10]
+    assert list(journal.read_since().timestamps) == expected
+
+    assert journal.compact() == 4
+    assert journal.journal_size() == 0
+    assert list(journal.read_since().timestamps) == expected
+    assert list(journal.read_since(YEAR).timestamps) == expected[1:]
+
+
+def test_append_after_torn_write(tmp_path):
+    journal = HistoricalJournal(tmp_path)
+    journal.append(_states(YEAR, YEAR + 10))
+
+    # Interrupted append: only part of a record hit the disk
+    with open(journal.journal_path, "ab") as fh:
+        fh.write(RECORD.pack(YEAR + 20, 1.0)[:5])
+
+    journal.append(_states(YEAR + 30))
+    assert journal.journal_size() == 3 * RECORD.size
+
+    states = journal.read_since()
+    assert list(states.timestamps) == [YEAR, YEAR + 10, YEAR + 30]
+    assert list(states.states) == [YEAR, YEAR + 10, YEAR + 30]
+
+    assert journal.compact() == 3
+    assert list(journal.read_since().timestamps) == [YEAR, YEAR + 10, YEAR + 30]
+
+
+def test_async_append_does_io_in_executor(tmp_path, monkeypatch):
+    monkeypatch.setattr(journal_mod, "JOURNAL_COMPACT_THRESHOLD", 2 * RECORD.size)
+
+    journal = HistoricalJournal(tmp_path)
+    journal_size = journal.journal_size
+    size_threads = []
+
+    def _journal_size():
+        size_threads.append(threading.current_thread())
+        return journal_size()
+
+    monkeypatch.setattr(journal, "journal_size", _journal_size)
+
+    async def _test():
+        loop = asyncio.get_running_loop()
+        hass = SimpleNamespace(
+            async_add_executor_job=lambda fn, *args: loop.run_in_executor(
+                None, fn, *args
+            )
+        )
+        assert await journal.async_append(hass, _states(YEAR, YEAR + 10)) == 2
+
+    asyncio.run(asyncio.wait_for(_test(), TIMEOUT))
+
+    # Compacted, the size check ran off the event loop thread
+    assert size_threads
+    assert threading.main_thread() not in size_threads
+    assert journal_size() == 0
+    assert list(journal.read_since().timestamps) == [YEAR, YEAR + 10]
@@ -0,0 +1,19 @@
+from homeassistant_historical_sensor.metrics import SensorMetrics
+
+
+def test_loop_time_counts_leaf_loop_phases_only():
+    metrics = SensorMetrics()
+    metrics.record("update", 10.0, nested=True)
+    metrics.record("fetch", 4.0, io=True)
+    metrics.record("sort", 1.0)
+    metrics.record("calculate", 2.0)
+    metrics.record("import", 3.0, executor=True)
+    metrics.record("loop_time_saved", 3.0, executor=True, nested=True)
+
+    assert metrics.loop_time == 3.0
+    assert metrics.executor_time == 3.0
+    assert metrics.io_time == 4.0
+
+    phases = metrics.as_dict()["phases"]
+    assert phases["update"]["nested"]
+    assert phases["fetch"]["io"]
@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from homeassistant_historical_sensor import sensor as sensor_mod
+from homeassistant_historical_sensor.calculators import CumulativeSumCalculator
+
+TIMEOUT = 10
+
+
+class PollSensor(sensor_mod.PollUpdateMixin, sensor_mod.HistoricalSensor):
+    STATISTIC_CALCULATOR = CumulativeSumCalculator()
+    entity_id = "sensor.poll"
+
+    def __init__(self, hass):
+        super().__init__()
+        self.hass = hass
+        self.fetch_error: Exception | None = None
+        self.scheduled: list[float] = []
+        self.fetch_gate: asyncio.Event | None = None
+        self.fetches = 0
+
+    async def async_update_historical(self):
+        self.fetches += 1
+        if self.fetch_gate is not None:
+            await self.fetch_gate.wait()
+
+        if self.fetch_error is not None:
+            raise self.fetch_error
+
+    async def async_write_historical(self):
+        return []
+
+    def _async_schedule_poll(self, delay: float) -> None:
+        self.scheduled.append(delay)
+
+
+@pytest.fixture
+def poll_sensor(monkeypatch):
+    async def _startup(self):
+        pass
+
+    monkeypatch.setattr(sensor_mod.HistoricalSensor, "_async_startup", _startup)
+    return PollSensor(SimpleNamespace(data={}))
+
+
+def test_startup_schedules_poll_after_failed_initial_update(poll_sensor):
+    poll_sensor.fetch_error = OSError("provider down")
+    asyncio.run(asyncio.wait_for(poll_sensor._async_startup(), TIMEOUT))
+
+    assert len(poll_sensor.scheduled) == 1
+
+
+def test_startup_schedules_poll_after_failed_load(poll_sensor, monkeypatch):
+    async def _startup(self):
+        raise OSError("storage broken")
+
+    monkeypatch.setattr(sensor_mod.HistoricalSensor, "_async_startup", _startup)
+    asyncio.run(asyncio.wait_for(poll_sensor._async_startup(), TIMEOUT))
+
+    assert len(poll_sensor.scheduled) == 1
+
+
+def test_overlapping_updates_are_coalesced(poll_sensor):
+    async def _test():
+        poll_sensor.fetch_gate = asyncio.Event()
+
+        first = asyncio.create_task(poll_sensor._async_historical_handle_update())
+        while not poll_sensor.fetches:
+            await asyncio.sleep(0)
+
+        # Arrive while the first update runs, one follow-up covers them all
+        overlapping = [
+            asyncio.create_task(poll_sensor._async_historical_handle_update())
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        poll_sensor.fetch_gate.set()
+
+        await asyncio.gather(first, *overlapping)
+
+    asyncio.run(asyncio.wait_for(_test(), TIMEOUT))
+
+    assert poll_sensor.fetches == 2
+    assert poll_sensor.historical_metrics.counters["coalesced_updates"] == 2
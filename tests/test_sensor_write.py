@@ -0,0 +1,94 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from homeassistant_historical_sensor import sensor as sensor_mod
+from homeassistant_historical_sensor import timemachine as tm
+from homeassistant_historical_sensor.calculators import CumulativeSumCalculator
+
+HOUR = 60 * 60
+TIMEOUT = 10
+
+
+class _WatermarkStore:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, statistic_id):
+        return self.data.get(statistic_id)
+
+    def async_set(self, statistic_id, watermark):
+        self.data[statistic_id] = watermark
+
+
+class WriteSensor(sensor_mod.HistoricalSensor):
+    CALCULATION_EXECUTOR_THRESHOLD = None
+    entity_id = "sensor.write"
+
+    @property
+    def name(self):
+        return "write"
+
+    @property
+    def unit_of_measurement(self):
+        return "L"
+
+    async def async_update_historical(self):
+        pass
+
+
+def _write_twice(calculator, first, second) -> list[int]:
+    store = _WatermarkStore()
+    imported = []
+
+    async def _get_store(hass):
+        return store
+
+    async def _last_statistic(hass, metadata, **kwargs):
+        return None
+
+    async def _import(hass, metadata, rows, **kwargs):
+        imported.extend(rows)
+        return []
+
+    sensor = WriteSensor()
+    sensor.STATISTIC_CALCULATOR = calculator
+    sensor.hass = None
+
+    async def _test():
+        for hours in (first, second):
+            states = [tm.HistoricalState(state=1.0, timestamp=h * HOUR) for h in hours]
+            await sensor._async_write_statistics(states)
+
+    with (
+        mock.patch.object(sensor_mod, "async_get_watermark_store", _get_store),
+        mock.patch.object(tm, "hass_get_last_statistic", _last_statistic),
+        mock.patch.object(sensor_mod, "async_import_statistics_chunked", _import),
+    ):
+        asyncio.run(asyncio.wait_for(_test(), TIMEOUT))
+
+    return [int(x["start"].timestamp()) // HOUR for x in imported]
+
+
+@pytest.mark.parametrize("border_in_previous_block", [True, False])
+def test_write_continues_after_last_statistic(border_in_previous_block):
+    calculator = CumulativeSumCalculator(
+        border_in_previous_block=border_in_previous_block
+    )
+    blocks = _write_twice(calculator, range(1, 4), range(1, 7))
+
+    # Every block written exactly once
+    expected = [h - 1 if border_in_previous_block else h for h in range(1, 7)]
+    assert blocks == expected
+
+
+def test_write_with_multi_hour_blocks():
+    calculator = CumulativeSumCalculator(granularity=3 * HOUR)
+    blocks = _write_twice(calculator, range(1, 4), range(1, 10))
+    assert blocks == [0, 3, 6]
+
+
+def test_calculator_rejects_partial_hour_granularity():
+    with pytest.raises(ValueError):
+        CumulativeSumCalculator(granularity=30 * 60)
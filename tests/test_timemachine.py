@@ -0,0 +1,102 @@
+import functools
+import itertools
+import random
+
+import pytest
+
+from homeassistant_historical_sensor import timemachine as tm
+
+
+def _states(*timestamps: int) -> list[tm.HistoricalState]:
+    return [tm.HistoricalState(state=float(ts), timestamp=ts) for ts in timestamps]
+
+
+@pytest.fixture(params=["numpy", "python"])
+def numpy_or_not(request, monkeypatch):
+    if request.param == "numpy":
+        if tm.get_numpy() is None:
+            pytest.skip("numpy not available")
+    else:
+        monkeypatch.setattr(tm, "get_numpy", lambda: None)
+
+
+def _blockize_groupby(states, **blockize_kwargs):
+    # group_by_interval before block keys and slices
+    fn = functools.partial(tm.blockize, **blockize_kwargs)
+    return [
+        (block, [(x.timestamp, x.state) for x in group])
+        for block, group in itertools.groupby(sorted(states, key=fn), key=fn)
+    ]
+
+
+@pytest.mark.parametrize("granularity", [3600, 3 * 3600])
+@pytest.mark.parametrize("border_in_previous_block", [True, False])
+def test_block_keys_match_blockize(numpy_or_not, granularity, border_in_previous_block):
+    kwargs = dict(
+        granularity=granularity, border_in_previous_block=border_in_previous_block
+    )
+
+    rng = random.Random(0)
+    # Several states per block, out of order, some on block borders
+    timestamps = rng.sample(range(450, 48 * 3600, 900), 150) + [3600, 10800, 10801]
+    states = _states(*timestamps)
+
+    expected = _blockize_groupby(states, **kwargs)
+
+    assert list(tm.block_keys(timestamps, **kwargs)) == [
+        tm.blockize(x, **kwargs) for x in states
+    ]
+
+    # Timelines are sorted by timestamp, not only by block
+    timeline_expected = _blockize_groupby(
+        sorted(states, key=lambda x: x.timestamp), **kwargs
+    )
+
+    for historical_states, want in (
+        (states, expected),
+        (tm.HistoricalStateArray.from_states(states), expected),
+        (tm.HistoricalTimeline(states), timeline_expected),
+    ):
+        got = [
+            (block, [(x.timestamp, x.state) for x in group])
+            for block, group in tm.group_by_interval(historical_states, **kwargs)
+        ]
+        assert got == want
+
+
+def test_timeline_copy_does_not_block_inserts():
+    timeline = tm.HistoricalTimeline(_states(10, 20, 30))
+    timestamps = timeline._timestamps
+
+    held = timeline.copy(timeline.insert(_states(20, 25)))
+    assert list(held.timestamps) == [20, 25, 30]
+
+    # Resized in place, no full copy because of the held states
+    timeline.insert(_states(40))
+    assert timeline._timestamps is timestamps
+    assert list(timeline.copy().timestamps) == [10, 20, 25, 30, 40]
+    assert list(held.timestamps) == [20, 25, 30]
+
+
+def test_timeline_view_blocks_inserts():
+    timeline = tm.HistoricalTimeline(_states(10, 20))
+    timestamps = timeline._timestamps
+
+    view = timeline.view()
+    timeline.insert(_states(30))
+    assert timeline._timestamps is not timestamps
+    assert list(view.timestamps) == [10, 20]
+
+
+def test_fingerprint_blocks_since():
+    states = _states(*range(1800, 6 * 3600, 1800))
+
+    for historical_states in (
+        states,
+        tm.HistoricalStateArray.from_states(states),
+        tm.HistoricalStateArray.from_states(reversed(states)),
+        tm.HistoricalTimeline(states),
+    ):
+        full = tm.fingerprint_blocks(historical_states)
+        partial = tm.fingerprint_blocks(historical_states, since=3 * 3600)
+        assert partial == {k: v for k, v in full.items() if k >= 3 * 3600}
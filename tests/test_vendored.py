@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+LIBRARY = ROOT / "homeassistant_historical_sensor"
+VENDORED = ROOT / "custom_components/home_water_usage/homeassistant_historical_sensor"
+
+
+@pytest.mark.parametrize(
+    "name", sorted(x.name for x in LIBRARY.glob("*.py")), ids=lambda x: x
+)
+def test_vendored_copy_matches_library(name):
+    # The integration ships its own copy of the library (see README), it must
+    # not drift from it
+    assert (VENDORED / name).read_text() == (LIBRARY / name).read_text()
+
+
+def test_vendored_copy_has_no_extra_modules():
+    assert {x.name for x in VENDORED.glob("*.py")} == {
+        x.name for x in LIBRARY.glob("*.py")
+    }
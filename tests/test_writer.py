@@ -0,0 +1,128 @@
+import asyncio
+import queue
+import threading
+import time
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+from homeassistant.components import recorder
+from homeassistant.components.recorder import statistics
+
+from homeassistant_historical_sensor import writer
+
+
+class FakeRecorder(threading.Thread):
+    """Recorder thread model: tasks run in order, each one commits on its own"""
+
+    def __init__(self, hass, delay: float = 0.05):
+        super().__init__(daemon=True)
+        self.hass = hass
+        self.delay = delay
+        self.committed: dict[str, list] = {}
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    @property
+    def backlog(self) -> int:
+        return self._queue.qsize()
+
+    def queue_task(self, task) -> None:
+        self._queue.put(task)
+
+    async def async_block_till_done(self) -> None:
+        # Same shortcut as the real recorder
+        if self._queue.empty():
+            return
+
+        raise AssertionError("writer must not rely on async_block_till_done")
+
+    def async_clear_statistics(self, statistic_ids) -> None:
+        self.queue_task(
+            _Task(lambda: [self.committed.pop(x, None) for x in statistic_ids])
+        )
+
+    def run(self) -> None:
+        while (task := self._queue.get()) is not None:
+            task.run(self)
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self.join()
+
+
+class _Task:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def run(self, instance: FakeRecorder) -> None:
+        time.sleep(instance.delay)
+        self.fn()
+
+
+@pytest.fixture
+def fake_recorder(monkeypatch):
+    instances = []
+
+    def _factory(hass):
+        instance = FakeRecorder(hass)
+        instance.start()
+        instances.append(instance)
+
+        def _import(hass, metadata, rows):
+            statistic_id = metadata["statistic_id"]
+            instance.queue_task(
+                _Task(
+                    lambda: instance.committed.setdefault(statistic_id, []).extend(rows)
+                )
+            )
+
+        monkeypatch.setattr(recorder, "get_instance", lambda hass: instance)
+        monkeypatch.setattr(statistics, "async_import_statistics", _import)
+        return instance
+
+    yield _factory
+
+    for instance in instances:
+        instance.stop()
+
+
+METADATA = {"statistic_id": "sensor.test", "unit_of_measurement": "L"}
+
+# A barrier the recorder never resolves must fail, not hang
+TIMEOUT = 10
+
+
+def _rows(n: int) -> list[dict]:
+    return [
+        {"start": datetime.fromtimestamp(3600 * i, UTC), "sum": i} for i in range(n)
+    ]
+
+
+def test_import_statistics_chunked_commits_before_returning(fake_recorder):
+    async def _test():
+        hass = SimpleNamespace(loop=asyncio.get_running_loop())
+        instance = fake_recorder(hass)
+
+        rows = _rows(10)
+        reports = await writer.async_import_statistics_chunked(
+            hass, METADATA, rows, chunk_size=3
+        )
+
+        assert instance.committed["sensor.test"] == rows
+        assert [x.rows for x in reports] == [3, 3, 3, 1]
+        assert all(x.commit_latency >= instance.delay for x in reports)
+
+    asyncio.run(asyncio.wait_for(_test(), TIMEOUT))
+
+
+def test_clear_statistics_commits_before_returning(fake_recorder):
+    async def _test():
+        hass = SimpleNamespace(loop=asyncio.get_running_loop())
+        instance = fake_recorder(hass)
+
+        await writer.async_import_statistics_chunked(hass, METADATA, _rows(2))
+        await writer.async_clear_statistics(hass, METADATA)
+
+        assert "sensor.test" not in instance.committed
+
+    asyncio.run(asyncio.wait_for(_test(), TIMEOUT))